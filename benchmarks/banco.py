@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+banco.py
+--------
+
+Banco de pruebas reproducible para los algoritmos de búsqueda.
+
+Corre BFS, DFS, IDS, UCS y A* sobre conjuntos de instancias aleatorias
+(con semilla) del 8 puzzle, el cubo de Rubik 2D, el camión mágico y los
+dos botes. Para cada corrida guarda el tiempo, los nodos expandidos y
+generados, los nodos por segundo, la memoria máxima (con tracemalloc) y
+el costo de la solución, en JSON y/o CSV. Con --base compara contra un
+JSON guardado antes y marca las regresiones.
+
+Se corre desde la raíz del repositorio:
+
+    python -m benchmarks.banco --salida base.json
+    python -m benchmarks.banco --base base.json --csv resultados.csv
+
+"""
+
+import argparse
+import csv
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+import busquedas
+import dos_botes
+import ocho_puzzle
+import problemas
+
+
+def h_cero(nodo):
+    """
+    Heurística nula, para A* en problemas sin heurística propia.
+
+    """
+    return 0
+
+
+def _caminata(problema, estado, pasos, rng):
+    """
+    Estado a `pasos` movimientos aleatorios de `estado`, evitando regresar
+    al estado anterior.
+
+    """
+    previo = None
+    for _ in range(pasos):
+        opciones = [problema.sucesor(estado, a)[0] for a in problema.acciones(estado)]
+        opciones = [s for s in opciones if s != previo] or opciones
+        previo, estado = estado, rng.choice(opciones)
+    return estado
+
+
+# Cada generador regresa una lista de (nombre, problema, s0, limite, heuristica),
+# donde limite es una cota de la longitud de la solución para DFS e IDS.
+
+def instancias_8puzzle(rng, cuantas, pasos=14):
+    problema = ocho_puzzle.Pb8Puzzle()
+    meta = problema.metas()[0]
+    return [(f"8puzzle-{i}", problema, _caminata(problema, meta, pasos, rng),
+             pasos, ocho_puzzle.h_2)
+            for i in range(cuantas)]
+
+
+def instancias_rubik(rng, cuantas, pasos=6):
+    # Deshacer una rotación toma dos más, así que el plan óptimo puede
+    # tener hasta 2 * pasos acciones.
+    problema = problemas.PbCuboRubik()
+    return [(f"rubik-{i}", problema, _caminata(problema, problema.meta, pasos, rng),
+             2 * pasos, problemas.h_2_problema_1)
+            for i in range(cuantas)]
+
+
+def instancias_camion(rng, cuantas):
+    problema = problemas.PbCamionMagico(100)
+    return [(f"camion-{i}", problema, rng.randint(1, 60), 100,
+             problemas.h_2_camion_magico(100))
+            for i in range(cuantas)]
+
+
+def instancias_dos_botes(rng, cuantas):
+    lista = []
+    while len(lista) < cuantas:
+        i = rng.randint(3, 30)
+        j = rng.randint(1, i - 1)
+        problema = dos_botes.PbDosBotes(i, j, rng.randint(1, i - 1))
+        if problema.es_resoluble((0, 0)):
+            lista.append((f"dos_botes-{len(lista)}", problema, (0, 0), 4 * i, h_cero))
+    return lista
+
+
+PROBLEMAS = {
+    '8puzzle': instancias_8puzzle,
+    'rubik': instancias_rubik,
+    'camion': instancias_camion,
+    'dos_botes': instancias_dos_botes,
+}
+
+ALGORITMOS = {
+    'BFS': lambda pb, s0, limite, h, est:
+        busquedas.busqueda_ancho(pb, s0, estadisticas=est),
+    'DFS': lambda pb, s0, limite, h, est:
+        busquedas.busqueda_profundo(pb, s0, limite, estadisticas=est),
+    'IDS': lambda pb, s0, limite, h, est:
+        busquedas.busqueda_profundidad_iterativa(pb, s0, limite, estadisticas=est),
+    'UCS': lambda pb, s0, limite, h, est:
+        busquedas.busqueda_costo_uniforme(pb, s0, estadisticas=est),
+    'A*': lambda pb, s0, limite, h, est:
+        busquedas.busqueda_A_estrella(pb, s0, h, estadisticas=est),
+}
+
+
+def mide(algoritmo, problema, s0, limite, heuristica, repeticiones=1, memoria=True):
+    """
+    Corre un algoritmo sobre una instancia y regresa sus medidas.
+
+    El tiempo es el mínimo de `repeticiones` corridas sin instrumentar; los
+    contadores salen de una corrida con EstadisticasBusqueda y la memoria
+    de otra con tracemalloc (que hace todo más lento, por eso va aparte).
+
+    """
+    tiempo = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        plan, _ = algoritmo(problema, s0, limite, heuristica, None)
+        transcurrido = time.perf_counter() - inicio
+        tiempo = transcurrido if tiempo is None else min(tiempo, transcurrido)
+
+    estadisticas = busquedas.EstadisticasBusqueda(mide_tiempos=False)
+    algoritmo(problema, s0, limite, heuristica, estadisticas)
+
+    memoria_max = None
+    if memoria:
+        tracemalloc.start()
+        algoritmo(problema, s0, limite, heuristica, None)
+        memoria_max = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        'costo': None if plan is None else plan.costo,
+        'tiempo': tiempo,
+        'expansiones': estadisticas.expansiones,
+        'generados': estadisticas.generados,
+        'nodos_por_segundo': estadisticas.generados / tiempo if tiempo else None,
+        'memoria_max': memoria_max,
+    }
+
+
+def corre(semilla=0, instancias=5, nombres_problemas=None, nombres_algoritmos=None,
+          repeticiones=1, memoria=True):
+    """
+    Corre el banco completo.
+
+    @return: Una lista de dicts, uno por (instancia, algoritmo).
+
+    """
+    resultados = []
+    for nombre_problema in nombres_problemas or PROBLEMAS:
+        rng = random.Random(f"{semilla}-{nombre_problema}")
+        for instancia, problema, s0, limite, h in PROBLEMAS[nombre_problema](rng, instancias):
+            for nombre_algoritmo in nombres_algoritmos or ALGORITMOS:
+                medidas = mide(ALGORITMOS[nombre_algoritmo], problema, s0, limite, h,
+                               repeticiones, memoria)
+                resultados.append(dict(problema=nombre_problema, instancia=instancia,
+                                       algoritmo=nombre_algoritmo, **medidas))
+    return resultados
+
+
+def guarda_json(resultados, ruta, semilla, instancias):
+    with open(ruta, 'w') as archivo:
+        json.dump({'semilla': semilla, 'instancias': instancias,
+                   'resultados': resultados}, archivo, indent=1)
+
+
+def guarda_csv(resultados, ruta):
+    with open(ruta, 'w', newline='') as archivo:
+        escritor = csv.DictWriter(archivo, fieldnames=list(resultados[0]))
+        escritor.writeheader()
+        escritor.writerows(resultados)
+
+
+def _totales(resultados):
+    totales = {}
+    for r in resultados:
+        t = totales.setdefault((r['problema'], r['algoritmo']),
+                               {'tiempo': 0.0, 'generados': 0, 'costos': []})
+        t['tiempo'] += r['tiempo']
+        t['generados'] += r['generados']
+        t['costos'].append(r['costo'])
+    return totales
+
+
+def compara(resultados, base, tolerancia=0.25, tiempo_minimo=0.1):
+    """
+    Compara contra una corrida base (con la misma semilla e instancias).
+
+    Es regresión que cambie algún costo o el número de nodos generados
+    (el algoritmo ya no hace lo mismo), o que el tiempo total de un par
+    (problema, algoritmo) crezca más de `tolerancia`. Los tiempos totales
+    menores a `tiempo_minimo` segundos son puro ruido y no se comparan.
+
+    @return: Una lista de cadenas, una por regresión.
+
+    """
+    actuales, anteriores = _totales(resultados), _totales(base)
+    regresiones = []
+    for clave, antes in anteriores.items():
+        ahora = actuales.get(clave)
+        if ahora is None:
+            continue
+        nombre = f"{clave[0]}/{clave[1]}"
+        if ahora['costos'] != antes['costos']:
+            regresiones.append(f"{nombre}: cambiaron los costos de las soluciones")
+        if ahora['generados'] != antes['generados']:
+            regresiones.append(f"{nombre}: nodos generados {antes['generados']} -> "
+                               f"{ahora['generados']}")
+        if (max(ahora['tiempo'], antes['tiempo']) >= tiempo_minimo and
+                ahora['tiempo'] > antes['tiempo'] * (1 + tolerancia)):
+            regresiones.append(f"{nombre}: tiempo {antes['tiempo']:.4f}s -> "
+                               f"{ahora['tiempo']:.4f}s")
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--instancias', type=int, default=5)
+    parser.add_argument('--problemas', nargs='+', choices=list(PROBLEMAS))
+    parser.add_argument('--algoritmos', nargs='+', choices=list(ALGORITMOS))
+    parser.add_argument('--repeticiones', type=int, default=1)
+    parser.add_argument('--sin-memoria', action='store_true',
+                        help="no medir memoria con tracemalloc")
+    parser.add_argument('--salida', help="archivo JSON de resultados")
+    parser.add_argument('--csv', help="archivo CSV de resultados")
+    parser.add_argument('--base', help="JSON de una corrida anterior para comparar")
+    parser.add_argument('--tolerancia', type=float, default=0.25)
+    parser.add_argument('--tiempo-minimo', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    base = None
+    if args.base:
+        with open(args.base) as archivo:
+            base = json.load(archivo)
+        args.semilla, args.instancias = base['semilla'], base['instancias']
+
+    resultados = corre(args.semilla, args.instancias, args.problemas, args.algoritmos,
+                       args.repeticiones, not args.sin_memoria)
+
+    print(f"{'problema':<10}{'algoritmo':<10}{'tiempo (s)':>12}"
+          f"{'generados':>12}{'nodos/s':>12}{'memoria (KB)':>14}")
+    for (problema, algoritmo), t in _totales(resultados).items():
+        memoria = [r['memoria_max'] for r in resultados
+                   if r['problema'] == problema and r['algoritmo'] == algoritmo
+                   and r['memoria_max'] is not None]
+        memoria = f"{max(memoria) / 1024:.1f}" if memoria else "-"
+        print(f"{problema:<10}{algoritmo:<10}{t['tiempo']:>12.4f}{t['generados']:>12}"
+              f"{t['generados'] / t['tiempo'] if t['tiempo'] else 0:>12.0f}"
+              f"{memoria:>14}")
+
+    if args.salida:
+        guarda_json(resultados, args.salida, args.semilla, args.instancias)
+    if args.csv:
+        guarda_csv(resultados, args.csv)
+    if base is not None:
+        regresiones = compara(resultados, base['resultados'], args.tolerancia,
+                              args.tiempo_minimo)
+        for regresion in regresiones:
+            print(f"REGRESIÓN {regresion}")
+        return 1 if regresiones else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,8 +9,29 @@ búsquedas en entornos determinísticos conocidos discretos
 completamente observables
 
 """
-from collections import deque
+from array import array
+import asyncio
+import bisect
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+import functools
 import heapq
+import itertools
+import math
+import multiprocessing
+import os
+import pickle
+import tempfile
+import time
+import zlib
+
+# NumPy es opcional. Solo lo usan las búsquedas por lotes (y los métodos
+# *_lote de los problemas y heurísticas que las alimentan); sin él esas
+# búsquedas lanzan ImportError y todo lo demás funciona igual.
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 class ProblemaBusqueda:
@@ -56,12 +77,330 @@ class ProblemaBusqueda:
         """
         raise NotImplementedError("No implementado todavía el método terminal.")
 
+    def predecesores(self, estado):
+        """
+        Estados desde los que se llega a estado con una sola acción.
+
+        Es opcional: solo lo necesitan las búsquedas bidireccionales, que
+        regresan a la búsqueda hacia adelante si el problema no lo define.
+
+        @param estado: Una tupla con un estado válido.
+        @return: Una lista [(estado_previo, accion, costo_local), ...] tal que
+                 sucesor(estado_previo, accion) == (estado, costo_local).
+
+        """
+        raise NotImplementedError("No implementado todavía el método predecesores.")
+
+    def metas(self):
+        """
+        Lista de estados meta, de donde arrancan las búsquedas hacia atrás.
+
+        Es opcional, igual que predecesores.
+
+        @return: Una lista de estados para los que terminal(estado) es True.
+
+        """
+        raise NotImplementedError("No implementado todavía el método metas.")
+
+    def canonico(self, estado):
+        """
+        Representante de los estados equivalentes a estado por una simetría
+        del problema.
+
+        Es opcional. Una simetría es una transformación de los estados que
+        respeta las acciones, sus costos y las metas, así que dos estados
+        simétricos están a la misma distancia de la meta y basta visitar
+        uno. Si el problema lo define, el almacén por omisión guarda los
+        visitados por su representante. Los planes no cambian: siguen
+        siendo los estados reales por los que pasó la búsqueda.
+
+        @param estado: Una tupla con un estado válido.
+        @return: El mismo valor para todos los estados simétricos entre sí.
+
+        """
+        return estado
+
+    def almacen(self):
+        """
+        Crea el almacén donde las búsquedas guardan los estados visitados.
+
+        Por omisión es una tabla hash (por representante, si el problema
+        define canonico); los problemas con estados que son permutaciones
+        pueden devolver un AlmacenRango, mucho más compacto.
+
+        @return: Un objeto AlmacenHash, AlmacenRango o AlmacenCanonico vacío.
+
+        """
+        if _implementa(self, 'canonico'):
+            return AlmacenCanonico(self.canonico, AlmacenHash())
+        return AlmacenHash()
+
+    def es_resoluble(self, s0):
+        """
+        Revisa, sin buscar, si desde s0 se puede llegar a una meta.
+
+        Es opcional. Todas las búsquedas lo consultan antes de empezar y
+        regresan (None, 0) de inmediato si es False, en lugar de recorrer
+        todo el espacio alcanzable. Solo debe regresar False cuando es
+        seguro que no hay solución; por omisión siempre regresa True.
+
+        @param s0: El estado inicial.
+        @return: False si no hay plan desde s0, True si puede haberlo.
+
+        """
+        return True
+
+
+def _implementa(problema, metodo):
+    """
+    Indica si la clase del problema sobrecarga un método opcional de
+    ProblemaBusqueda.
+
+    """
+    return getattr(type(problema), metodo) is not getattr(ProblemaBusqueda, metodo)
+
+
+# Número de bits encendidos de cada entero de 16 bits, para rango_parcial.
+_UNOS = bytes(bin(i).count('1') for i in range(1 << 16))
+
+
+def rango_parcial(posiciones, n):
+    """
+    Rango de una permutación parcial (código de Lehmer parcial).
+
+    @param posiciones: Una secuencia de k valores distintos en range(n).
+    @return: Un entero en range(n! / (n - k)!), distinto para cada secuencia.
+
+    """
+    rango, usados, base = 0, 0, n
+    if n <= 16:
+        for p in posiciones:
+            rango = rango * base + p - _UNOS[usados & ((1 << p) - 1)]
+            usados |= 1 << p
+            base -= 1
+        return rango
+    for p in posiciones:
+        rango = rango * base + p - bin(usados & ((1 << p) - 1)).count('1')
+        usados |= 1 << p
+        base -= 1
+    return rango
+
+
+def rango_lote(permutaciones):
+    """
+    rango_parcial de cada renglón de un ndarray de permutaciones de
+    0..k-1, todos a la vez (necesita NumPy).
+
+    @param permutaciones: ndarray de forma (m, k).
+    @return: ndarray de m enteros en range(k!).
+
+    """
+    a = permutaciones.astype(np.int64)
+    k = a.shape[1]
+    rango = np.zeros(len(a), dtype=np.int64)
+    for i in range(k):
+        menores = (a[:, i + 1:] < a[:, i:i + 1]).sum(axis=1)
+        rango = rango * (k - i) + menores
+    return rango
+
+
+def desrango_parcial(rango, n, k):
+    """
+    Inversa de rango_parcial.
+
+    @param rango: Un entero en range(n! / (n - k)!).
+    @param n: Número de valores posibles.
+    @param k: Longitud de la secuencia.
+    @return: Una lista de k valores distintos en range(n).
+
+    """
+    digitos = []
+    for i in range(k - 1, -1, -1):
+        rango, d = divmod(rango, n - i)
+        digitos.append(d)
+    libres = list(range(n))
+    return [libres.pop(d) for d in reversed(digitos)]
+
+
+def paridad(permutacion, referencia):
+    """
+    Paridad de una permutación respecto a otra del mismo conjunto de
+    valores (0 si es par, 1 si es impar), en O(n) siguiendo sus ciclos.
+
+    @param permutacion: Una secuencia de valores distintos.
+    @param referencia: Una secuencia con los mismos valores.
+
+    """
+    posicion = {v: i for i, v in enumerate(referencia)}
+    destino = [posicion[v] for v in permutacion]
+    visto = [False] * len(destino)
+    transposiciones = 0
+    for inicio in range(len(destino)):
+        largo, i = 0, inicio
+        while not visto[i]:
+            visto[i] = True
+            i = destino[i]
+            largo += 1
+        if largo:
+            transposiciones += largo - 1
+    return transposiciones % 2
+
+
+class AlmacenHash:
+    """
+    Almacén de estados visitados respaldado por un diccionario.
+
+    Sirve para cualquier problema; guarda para cada estado un valor
+    (la profundidad o el costo g, según la búsqueda).
+
+    """
+    __slots__ = ('tabla',)
+
+    def __init__(self):
+        self.tabla = {}
+
+    def get(self, estado, defecto=None):
+        return self.tabla.get(estado, defecto)
+
+    def __contains__(self, estado):
+        return estado in self.tabla
+
+    def __getitem__(self, estado):
+        return self.tabla[estado]
+
+    def __setitem__(self, estado, valor):
+        self.tabla[estado] = valor
+
+    def __len__(self):
+        return len(self.tabla)
+
+
+class AlmacenRango:
+    """
+    Almacén de estados visitados indexado por un hash perfecto.
+
+    Para problemas cuyos estados se pueden numerar 0..tamano-1 (por
+    ejemplo con rango_parcial en los problemas de permutaciones), los
+    valores se guardan en un array de tamaño fijo en lugar de un dict:
+    2 bytes por estado posible con el tipo 'H', sin importar cuántos se
+    visiten. Los valores deben ser enteros menores que el del marcador
+    de vacío (el máximo del tipo).
+
+    """
+    __slots__ = ('rango', 'valores', 'vacio', 'cuantos')
+
+    def __init__(self, rango, tamano, tipo='H'):
+        """
+        @param rango: Función estado -> entero en range(tamano).
+        @param tamano: Número de estados posibles.
+        @param tipo: Código de tipo de array para los valores.
+
+        """
+        self.rango = rango
+        self.vacio = (1 << (8 * array(tipo).itemsize)) - 1
+        self.valores = array(tipo, [self.vacio]) * tamano
+        self.cuantos = 0
+
+    def get(self, estado, defecto=None):
+        valor = self.valores[self.rango(estado)]
+        return defecto if valor == self.vacio else valor
+
+    def __contains__(self, estado):
+        return self.valores[self.rango(estado)] != self.vacio
+
+    def __getitem__(self, estado):
+        valor = self.valores[self.rango(estado)]
+        if valor == self.vacio:
+            raise KeyError(estado)
+        return valor
+
+    def __setitem__(self, estado, valor):
+        r = self.rango(estado)
+        if self.valores[r] == self.vacio:
+            self.cuantos += 1
+        self.valores[r] = valor
+
+    def __len__(self):
+        return self.cuantos
+
+
+class AlmacenCanonico:
+    """
+    Almacén que guarda cada estado bajo su representante canonico(estado),
+    sobre otro almacén (AlmacenHash o AlmacenRango).
+
+    """
+    __slots__ = ('canonico', 'almacen')
+
+    def __init__(self, canonico, almacen):
+        """
+        @param canonico: Función estado -> representante (ver
+                         ProblemaBusqueda.canonico).
+        @param almacen: El almacén donde se guardan los representantes.
+
+        """
+        self.canonico = canonico
+        self.almacen = almacen
+
+    def get(self, estado, defecto=None):
+        return self.almacen.get(self.canonico(estado), defecto)
+
+    def __contains__(self, estado):
+        return self.canonico(estado) in self.almacen
+
+    def __getitem__(self, estado):
+        return self.almacen[self.canonico(estado)]
+
+    def __setitem__(self, estado, valor):
+        self.almacen[self.canonico(estado)] = valor
+
+    def __len__(self):
+        return len(self.almacen)
+
+
+def simetrias_tablero(transformaciones, meta):
+    """
+    Simetrías de un problema cuyo estado es un tablero con una etiqueta en
+    cada casilla, a partir de transformaciones de las casillas.
+
+    Mover el contenido de cada casilla p a la casilla g[p] cambia la meta
+    por otro tablero, así que además se renombran las etiquetas para que
+    la meta quede fija: la etiqueta meta[p] se cambia por meta[g[p]].
+
+    @param transformaciones: Lista de permutaciones g de las casillas que
+                             respetan las acciones del problema.
+    @param meta: El tablero meta.
+    @return: Lista de pares (origen, etiqueta) tales que el tablero
+             transformado de t es tuple(etiqueta[t[o]] for o in origen).
+             Las etiquetas deben ser enteros no negativos.
+
+    """
+    simetrias = []
+    for g in transformaciones:
+        origen = [0] * len(g)
+        for p, q in enumerate(g):
+            origen[q] = p
+        etiqueta = [0] * (max(meta) + 1)
+        for p, q in enumerate(g):
+            etiqueta[meta[p]] = meta[q]
+        simetrias.append((tuple(origen), etiqueta))
+    return simetrias
+
 
 class NodoBusqueda:
     """
     Clase para implementar un árbol como estructura de datos.
 
+    Se usan `__slots__` para que cada nodo no cargue con un `__dict__`,
+    ya que en las fronteras grandes de A* y UCS el costo en memoria de
+    los nodos es lo que domina.
+
+    El campo `h` guarda el valor de la heurística del nodo una vez
+    calculado (None mientras no se calcule).
+
     """
+    __slots__ = ('estado', 'accion', 'padre', 'costo', 'profundidad', 'h')
+
     def __init__(self, estado, accion=None, padre=None, costo_local=0):
         """
         Inicializa un nodo como una estructura
@@ -72,22 +411,37 @@ class NodoBusqueda:
         self.padre = padre
         self.costo = 0 if not padre else padre.costo + costo_local
         self.profundidad = 0 if not padre else padre.profundidad + 1
+        self.h = None
 
-    def expande(self, pb_busqueda):
+    def expande(self, pb_busqueda, heuristica=None):
         """
         Expande un nodo en todos sus nodos hijos de acuerdo al problema pb_busqueda
 
+        Si se da una heurística con evaluación incremental, esto es, con un
+        atributo `delta(estado_padre, accion, estado_hijo, h_padre)` que
+        regresa la h del hijo, y este nodo ya tiene su h calculada, a cada
+        hijo se le calcula su h con delta al generarlo.
+
         @param pb_busqueda: Un objeto de una clase heredada de ProblemaBusqueda
+        @param heuristica: Una función heuristica(nodo) opcional.
         @return: Un generador de posibles nodos sucesores
 
         """
+        delta = getattr(heuristica, 'delta', None)
+        if delta is None or self.h is None:
+            for a in pb_busqueda.acciones(self.estado):
+                estado_sucesor, costo_local = pb_busqueda.sucesor(self.estado, a)
+                yield NodoBusqueda(
+                    estado_sucesor,
+                    a,
+                    self,
+                    costo_local)
+            return
         for a in pb_busqueda.acciones(self.estado):
             estado_sucesor, costo_local = pb_busqueda.sucesor(self.estado, a)
-            yield NodoBusqueda(
-                estado_sucesor,
-                a,
-                self,
-                costo_local)
+            hijo = NodoBusqueda(estado_sucesor, a, self, costo_local)
+            hijo.h = delta(self.estado, a, estado_sucesor, self.h)
+            yield hijo
 
     def genera_plan(self):
         """
@@ -100,11 +454,15 @@ class NodoBusqueda:
                     acción ni costo asociado. 
 
         """
-        return (
-            [(self.estado, None, None)] if self.padre is None else
-             self.padre.genera_plan()[:-1] + [(self.padre.estado, self.accion, self.costo), 
-                                              (self.estado, None, None)]
-        )
+        # Se recorre la cadena de padres de forma iterativa (sin recursión ni
+        # copias de listas) y al final se invierte, por lo que es O(profundidad).
+        plan = [(self.estado, None, None)]
+        nodo = self
+        while nodo.padre is not None:
+            plan.append((nodo.padre.estado, nodo.accion, nodo.costo))
+            nodo = nodo.padre
+        plan.reverse()
+        return plan
 
     def __str__(self):
         """
@@ -124,21 +482,429 @@ class NodoBusqueda:
         return self.profundidad < other.profundidad
 
 
-def busqueda_ancho(problema, s0):
+def nodo_de_plan(plan):
+    """
+    Reconstruye un NodoBusqueda a partir de la lista de genera_plan.
+
+    @param plan: Una lista [(x0, a0, c0), ..., (xT, None, None)].
+    @return: Un NodoBusqueda con el mismo plan, costos y profundidad.
+
+    """
+    nodo = NodoBusqueda(plan[0][0])
+    for (_, accion, costo), (estado, _, _) in zip(plan, plan[1:]):
+        nodo = NodoBusqueda(estado, accion, nodo, costo - nodo.costo)
+    return nodo
+
+
+class ColaPrioridad:
+    """
+    Frontera indexada por estado para UCS y A*.
+
+    Cada entrada del heap es una lista [f, h, contador, nodo], de forma
+    que los empates en f se rompen por h y después por orden de llegada,
+    sin llegar nunca a comparar nodos. Cuando se encuentra un mejor camino
+    a un estado que sigue en la frontera, la entrada vieja se invalida
+    (se le pone el nodo en None) y se agrega una nueva; las entradas
+    invalidadas se descartan al extraer, sin expandirlas ni contarlas.
+
+    """
+    __slots__ = ('heap', 'entradas', 'contador')
+
+    def __init__(self):
+        self.heap = []
+        self.entradas = {}
+        self.contador = itertools.count()
+
+    def agrega(self, nodo, f, h=0):
+        """
+        Agrega un nodo a la frontera o mejora la entrada de su estado.
+
+        @param nodo: Un objeto NodoBusqueda.
+        @param f: La prioridad del nodo (menor sale primero).
+        @param h: Valor para romper empates en f (menor sale primero).
+
+        """
+        vieja = self.entradas.get(nodo.estado)
+        if vieja is not None:
+            vieja[-1] = None
+        entrada = [f, h, next(self.contador), nodo]
+        self.entradas[nodo.estado] = entrada
+        heapq.heappush(self.heap, entrada)
+
+    def extrae(self):
+        """
+        Extrae el nodo vigente de menor prioridad.
+
+        @return: Un objeto NodoBusqueda, o None si la frontera está vacía.
+
+        """
+        heap = self.heap
+        while heap:
+            nodo = heapq.heappop(heap)[-1]
+            if nodo is not None:
+                del self.entradas[nodo.estado]
+                return nodo
+        return None
+
+    def minimo(self):
+        """
+        Prioridad del nodo vigente que saldría primero.
+
+        @return: La menor f en la frontera, o infinito si está vacía.
+
+        """
+        heap = self.heap
+        while heap and heap[0][-1] is None:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else math.inf
+
+    def __contains__(self, estado):
+        return estado in self.entradas
+
+    def __len__(self):
+        return len(self.entradas)
+
+
+class CacheSoluciones:
+    """
+    Sufijos óptimos de planes ya resueltos, para un mismo problema (misma
+    meta), compartidos entre búsquedas.
+
+    Para cada estado de un plan óptimo se guarda su costo exacto a la meta
+    h*(estado) y el resto del plan desde ahí. Los estados de un mismo plan
+    comparten una sola tupla de pasos, así que guardar un plan completo
+    cuesta una entrada por estado. La tabla está acotada a `max_estados`
+    entradas y se desaloja la que lleva más tiempo sin usarse.
+
+    Solo se le deben enseñar planes óptimos (por ejemplo los de A* con una
+    heurística admisible), si no h* deja de ser exacta.
+
+    """
+    def __init__(self, max_estados=1000000):
+        """
+        @param max_estados: Máximo número de estados guardados.
+
+        """
+        self.max_estados = max_estados
+        self.entradas = OrderedDict()
+
+    def costo(self, estado):
+        """
+        Costo exacto del estado a la meta, si se conoce.
+
+        @return: h*(estado), o None si el estado no está en el caché.
+
+        """
+        entrada = self.entradas.get(estado)
+        if entrada is None:
+            return None
+        self.entradas.move_to_end(estado)
+        return entrada[0]
+
+    def completa(self, nodo):
+        """
+        Completa el plan de un nodo cuyo estado está en el caché.
+
+        @param nodo: Un NodoBusqueda.
+        @return: El NodoBusqueda final del plan que sigue a `nodo` por el
+                 sufijo guardado hasta la meta, o None si no está.
+
+        """
+        entrada = self.entradas.get(nodo.estado)
+        if entrada is None:
+            return None
+        self.entradas.move_to_end(nodo.estado)
+        _, pasos, i = entrada
+        for accion, estado, costo_local in pasos[i:]:
+            nodo = NodoBusqueda(estado, accion, nodo, costo_local)
+        return nodo
+
+    def aprende(self, nodo):
+        """
+        Guarda todos los estados del plan óptimo que termina en `nodo`.
+
+        @param nodo: El NodoBusqueda final de un plan óptimo.
+
+        """
+        total = nodo.costo
+        pasos = []
+        nodos = [nodo]
+        while nodo.padre is not None:
+            pasos.append((nodo.accion, nodo.estado, nodo.costo - nodo.padre.costo))
+            nodo = nodo.padre
+            nodos.append(nodo)
+        pasos.reverse()
+        pasos = tuple(pasos)
+        entradas = self.entradas
+        for i, nodo in enumerate(reversed(nodos)):
+            entradas[nodo.estado] = (total - nodo.costo, pasos, i)
+            entradas.move_to_end(nodo.estado)
+        while len(entradas) > self.max_estados:
+            entradas.popitem(last=False)
+
+    def guarda(self, ruta):
+        """
+        Guarda el caché en disco (con pickle).
+
+        """
+        with open(ruta, 'wb') as archivo:
+            pickle.dump((self.max_estados, self.entradas), archivo,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def carga(cls, ruta):
+        """
+        Carga un caché guardado con guarda.
+
+        """
+        with open(ruta, 'rb') as archivo:
+            max_estados, entradas = pickle.load(archivo)
+        cache = cls(max_estados)
+        cache.entradas = entradas
+        return cache
+
+    def __contains__(self, estado):
+        return estado in self.entradas
+
+    def __len__(self):
+        return len(self.entradas)
+
+
+class EstadisticasBusqueda:
+    """
+    Contadores, tiempos y ganchos de una búsqueda.
+
+    Se pasa a cualquier búsqueda con el parámetro `estadisticas`. La
+    búsqueda envuelve al problema y a la heurística para contar y medir
+    cada llamada, y va registrando el tamaño de la frontera y de los
+    visitados. Si no se pasa, las búsquedas no hacen nada de esto.
+
+    Campos:
+        expansiones: nodos a los que se les calcularon sus sucesores.
+        generados: nodos sucesores generados.
+        agregados: sucesores que entraron a la frontera.
+        duplicados: sucesores descartados por ya tener un mejor camino.
+        reaperturas: sucesores agregados de estados que ya se habían
+                     expandido (mejorar un estado que sigue en la
+                     frontera no cuenta).
+        max_frontera, max_cerrados: tamaño máximo de la frontera y de los
+                                    visitados.
+        capas: número de estados nuevos de cada profundidad, en las
+               búsquedas que avanzan por capas (busqueda_ancho_externa).
+        tiempos: segundos en 'acciones', 'sucesor', 'terminal',
+                 'heuristica', 'resto' (frontera y contabilidad) y 'total'.
+
+    """
+    FASES = ('acciones', 'sucesor', 'terminal', 'heuristica')
+
+    def __init__(self, al_expandir=None, al_generar=None, mide_tiempos=True):
+        """
+        @param al_expandir: Función opcional al_expandir(estado).
+        @param al_generar: Función opcional
+                           al_generar(estado, accion, estado_sucesor, costo_local).
+        @param mide_tiempos: Si se mide el tiempo de cada fase.
+
+        """
+        self.al_expandir = al_expandir
+        self.al_generar = al_generar
+        self.mide_tiempos = mide_tiempos
+        self.expansiones = 0
+        self.generados = 0
+        self.agregados = 0
+        self.reaperturas = 0
+        self.max_frontera = 0
+        self.max_cerrados = 0
+        self.capas = []
+        self.tiempos = dict.fromkeys(self.FASES + ('resto', 'total'), 0.0)
+        self._anidadas = 0
+
+    @property
+    def duplicados(self):
+        return self.generados - self.agregados
+
+    def observa(self, tam_frontera, tam_cerrados):
+        """
+        Registra el tamaño actual de la frontera y de los visitados.
+
+        """
+        if tam_frontera > self.max_frontera:
+            self.max_frontera = tam_frontera
+        if tam_cerrados > self.max_cerrados:
+            self.max_cerrados = tam_cerrados
+
+    def instrumenta(self, problema, heuristica=None):
+        """
+        Envuelve al problema (y a la heurística, si se da) para medirlos.
+
+        @return: Una tupla (problema, heuristica) envueltos.
+
+        """
+        if not isinstance(problema, _ProblemaMedido):
+            problema = _ProblemaMedido(problema, self)
+        if heuristica is not None and not isinstance(heuristica, _HeuristicaMedida):
+            heuristica = _HeuristicaMedida(heuristica, self)
+        return problema, heuristica
+
+    def __str__(self):
+        tiempos = ", ".join(f"{fase}: {t:.4f}s" for fase, t in self.tiempos.items())
+        capas = f"Capas: {self.capas}\n" if self.capas else ""
+        return (f"Expansiones: {self.expansiones}\n"
+                f"Generados: {self.generados}\n"
+                f"Duplicados descartados: {self.duplicados}\n"
+                f"Reaperturas: {self.reaperturas}\n"
+                f"Frontera máxima: {self.max_frontera}\n"
+                f"Visitados máximo: {self.max_cerrados}\n"
+                + capas +
+                f"Tiempos: {tiempos}")
+
+
+class _ProblemaMedido:
+    """
+    Envoltura de un problema que cuenta y mide acciones, sucesor y terminal
+    para EstadisticasBusqueda. Los demás atributos pasan al problema.
+
+    """
+    def __init__(self, problema, estadisticas):
+        self.problema = problema
+        self.estadisticas = estadisticas
+
+    def __getattr__(self, nombre):
+        return getattr(self.problema, nombre)
+
+    def _mide(self, fase, metodo, *args):
+        if not self.estadisticas.mide_tiempos:
+            return metodo(*args)
+        inicio = time.perf_counter()
+        resultado = metodo(*args)
+        self.estadisticas.tiempos[fase] += time.perf_counter() - inicio
+        return resultado
+
+    def acciones(self, estado):
+        estadisticas = self.estadisticas
+        estadisticas.expansiones += 1
+        if estadisticas.al_expandir is not None:
+            estadisticas.al_expandir(estado)
+        return self._mide('acciones', self.problema.acciones, estado)
+
+    def sucesor(self, estado, accion):
+        estadisticas = self.estadisticas
+        estadisticas.generados += 1
+        estado_sucesor, costo_local = self._mide('sucesor', self.problema.sucesor, estado, accion)
+        if estadisticas.al_generar is not None:
+            estadisticas.al_generar(estado, accion, estado_sucesor, costo_local)
+        return estado_sucesor, costo_local
+
+    def predecesores(self, estado):
+        estadisticas = self.estadisticas
+        estadisticas.expansiones += 1
+        if estadisticas.al_expandir is not None:
+            estadisticas.al_expandir(estado)
+        previos = self._mide('sucesor', self.problema.predecesores, estado)
+        estadisticas.generados += len(previos)
+        return previos
+
+    def terminal(self, estado):
+        return self._mide('terminal', self.problema.terminal, estado)
+
+
+class _HeuristicaMedida:
+    """
+    Envoltura de una heurística (y de su delta, si la tiene) que mide su
+    tiempo para EstadisticasBusqueda.
+
+    """
+    def __init__(self, heuristica, estadisticas):
+        self.heuristica = heuristica
+        self.estadisticas = estadisticas
+        if getattr(heuristica, 'delta', None) is not None:
+            self.delta = self._delta
+
+    def __call__(self, nodo):
+        if not self.estadisticas.mide_tiempos:
+            return self.heuristica(nodo)
+        inicio = time.perf_counter()
+        h = self.heuristica(nodo)
+        self.estadisticas.tiempos['heuristica'] += time.perf_counter() - inicio
+        return h
+
+    def _delta(self, estado_padre, accion, estado_hijo, h_padre):
+        if not self.estadisticas.mide_tiempos:
+            return self.heuristica.delta(estado_padre, accion, estado_hijo, h_padre)
+        inicio = time.perf_counter()
+        h = self.heuristica.delta(estado_padre, accion, estado_hijo, h_padre)
+        self.estadisticas.tiempos['heuristica'] += time.perf_counter() - inicio
+        return h
+
+
+def _con_estadisticas(busqueda):
+    """
+    Decorador que mide el tiempo total de una búsqueda cuando recibe
+    `estadisticas`, solo en la llamada más externa (IDS llama a DFS).
+
+    """
+    @functools.wraps(busqueda)
+    def envoltura(*args, estadisticas=None, **kwargs):
+        if estadisticas is None:
+            return busqueda(*args, **kwargs)
+        estadisticas._anidadas += 1
+        inicio = time.perf_counter()
+        try:
+            return busqueda(*args, estadisticas=estadisticas, **kwargs)
+        finally:
+            estadisticas._anidadas -= 1
+            if not estadisticas._anidadas:
+                _suma_tiempo_total(estadisticas, time.perf_counter() - inicio)
+    return envoltura
+
+
+def _suma_tiempo_total(estadisticas, segundos):
+    tiempos = estadisticas.tiempos
+    tiempos['total'] += segundos
+    tiempos['resto'] = tiempos['total'] - sum(
+        tiempos[fase] for fase in EstadisticasBusqueda.FASES)
+
+
+def _agota(pasos):
+    """
+    Corre hasta el final el generador de pasos de una búsqueda (ver
+    BusquedaPausable) y devuelve su resultado (plan, nodos_visitados).
+
+    """
+    siguiente = pasos.__next__
+    while True:
+        try:
+            siguiente()
+        except StopIteration as fin:
+            return fin.value
+
+
+@_con_estadisticas
+def busqueda_ancho(problema, s0, estadisticas=None):
     """
     Búsqueda a lo ancho para un problema de búsquedas dado
 
     @param problema: Un objeto de una clase heredada de ProblemaBusqueda
+    @param estadisticas: Un EstadisticasBusqueda opcional que se llena
+                         durante la búsqueda.
 
     @return Un objeto tipo Nodo con un plan completo
 
     """
+    return _agota(_pasos_ancho(problema, s0, estadisticas))
+
+
+def _pasos_ancho(problema, s0, estadisticas=None):
+    if not problema.es_resoluble(s0):
+        return None, 0
+    if estadisticas is not None:
+        problema, _ = estadisticas.instrumenta(problema)
     nodos_visitados = 1
     if problema.terminal(s0):
-        return NodoBusqueda(s0)
+        return NodoBusqueda(s0), nodos_visitados
 
     frontera = deque([NodoBusqueda(s0)])
-    estados_visitados = {s0}
+    estados_visitados = problema.almacen()
+    estados_visitados[s0] = 0
 
     while frontera:
         plan = frontera.popleft()
@@ -149,23 +915,43 @@ def busqueda_ancho(problema, s0):
             if problema.terminal(hijo.estado):
                 return hijo, nodos_visitados
             frontera.append(hijo)
-            estados_visitados.add(hijo.estado)
+            estados_visitados[hijo.estado] = hijo.profundidad
+            if estadisticas is not None:
+                estadisticas.agregados += 1
+        if estadisticas is not None:
+            estadisticas.observa(len(frontera), len(estados_visitados))
+        yield len(frontera), len(estados_visitados)
     return None, nodos_visitados
 
 
-def busqueda_profundo(problema, s0, max_profundidad=None):
+@_con_estadisticas
+def busqueda_profundo(problema, s0, max_profundidad=None, estadisticas=None):
     """
     Búsqueda a lo profundo para un problema de búsquedas dado
 
     @param problema: Un objeto de una clase heredada de ProblemaBusqueda
     @param max_profundidad: Máxima profundidad de búsqueda
+    @param estadisticas: Un EstadisticasBusqueda opcional que se llena
+                         durante la búsqueda.
 
     @return Un objeto tipo Nodo con la estructura completa
 
     """
+    return _agota(_pasos_profundo(problema, s0, max_profundidad, estadisticas))
+
+
+def _pasos_profundo(problema, s0, max_profundidad=None, estadisticas=None):
+    if not problema.es_resoluble(s0):
+        return None, 0
+    if estadisticas is not None:
+        problema, _ = estadisticas.instrumenta(problema)
     frontera = deque([NodoBusqueda(s0)])
-    visitados = {s0: 0}
+    visitados = problema.almacen()
+    visitados[s0] = 0
     nodos_visitados = 0
+    # La pila no mejora entradas, así que para contar las reaperturas hay
+    # que saber qué estados ya se expandieron (solo si se piden).
+    expandidos = set() if estadisticas is not None else None
 
     while frontera:
         plan = frontera.pop()
@@ -174,54 +960,92 @@ def busqueda_profundo(problema, s0, max_profundidad=None):
             return plan, nodos_visitados
         if max_profundidad is not None and max_profundidad == plan.profundidad:
             continue
+        if expandidos is not None:
+            expandidos.add(plan.estado)
         for hijo in plan.expande(problema):
-            if hijo.estado not in visitados or visitados[hijo.estado] > hijo.profundidad:
+            profundidad = visitados.get(hijo.estado)
+            if profundidad is None or profundidad > hijo.profundidad:
                 frontera.append(hijo)
                 visitados[hijo.estado] = hijo.profundidad
+                if estadisticas is not None:
+                    estadisticas.agregados += 1
+                    estadisticas.reaperturas += hijo.estado in expandidos
+        if estadisticas is not None:
+            estadisticas.observa(len(frontera), len(visitados))
+        yield len(frontera), len(visitados)
     return None, nodos_visitados
 
 
-def busqueda_profundidad_iterativa(problema, s0, max_profundidad=20):
+@_con_estadisticas
+def busqueda_profundidad_iterativa(problema, s0, max_profundidad=20, estadisticas=None):
     """
     Búsqueda por profundidad iterativa dado
 
     @param problema: Un objeto de una clase heredada de ProblemaBusqueda
     @param max_profundidad: Máxima profundidad de búsqueda
+    @param estadisticas: Un EstadisticasBusqueda opcional que se llena
+                         durante la búsqueda.
     @return Un objeto tipo Nodo con la estructura completa
 
     """
+    return _agota(_pasos_profundidad_iterativa(problema, s0, max_profundidad, estadisticas))
+
+
+def _pasos_profundidad_iterativa(problema, s0, max_profundidad=20, estadisticas=None):
+    if not problema.es_resoluble(s0):
+        return None, 0
     nodos_visitados = 0
     for profundidad in range(1, max_profundidad + 1):
-        plan, nodos = busqueda_profundo(problema, s0, profundidad)
+        plan, nodos = yield from _pasos_profundo(problema, s0, profundidad, estadisticas)
         nodos_visitados += nodos
         if plan is not None:
             return plan, nodos_visitados
     return None, nodos_visitados
 
 
-def busqueda_costo_uniforme(problema, s0):
+@_con_estadisticas
+def busqueda_costo_uniforme(problema, s0, estadisticas=None):
     """
     Búsqueda por costo uniforme
 
     @param problema: Un objeto de una clase heredada de ProblemaBusqueda
+    @param estadisticas: Un EstadisticasBusqueda opcional que se llena
+                         durante la búsqueda.
 
     @return Un objeto tipo Nodo con la estructura completa
 
     """
-    frontera = []
-    heapq.heappush(frontera, (0, NodoBusqueda(s0)))
-    visitados = {s0: 0}
+    return _agota(_pasos_costo_uniforme(problema, s0, estadisticas))
+
+
+def _pasos_costo_uniforme(problema, s0, estadisticas=None):
+    if not problema.es_resoluble(s0):
+        return None, 0
+    if estadisticas is not None:
+        problema, _ = estadisticas.instrumenta(problema)
+    frontera = ColaPrioridad()
+    frontera.agrega(NodoBusqueda(s0), 0)
+    visitados = problema.almacen()
+    visitados[s0] = 0
     nodos_visitados = 0
 
     while frontera:
-        _, plan = heapq.heappop(frontera)
+        plan = frontera.extrae()
         nodos_visitados += 1
         if problema.terminal(plan.estado):
             return plan, nodos_visitados
         for hijo in plan.expande(problema):
-            if (hijo.estado not in visitados or visitados[hijo.estado] > hijo.costo):
-                heapq.heappush(frontera, (hijo.costo, hijo))
+            costo = visitados.get(hijo.estado)
+            if costo is None or costo > hijo.costo:
+                if estadisticas is not None:
+                    estadisticas.agregados += 1
+                    estadisticas.reaperturas += (costo is not None and
+                                                 hijo.estado not in frontera)
+                frontera.agrega(hijo, hijo.costo)
                 visitados[hijo.estado] = hijo.costo
+        if estadisticas is not None:
+            estadisticas.observa(len(frontera), len(visitados))
+        yield len(frontera), len(visitados)
     return None, nodos_visitados
 
 # ---------------------------------------------------------------------
@@ -235,7 +1059,23 @@ def busqueda_costo_uniforme(problema, s0):
 # ---------------------------------------------------------------------
 
 
-def busqueda_A_estrella(problema, s0, heuristica):
+def _prioridad_A_estrella(nodo, cache):
+    """
+    (f, h) con que entra un nodo a la frontera de A*, usando la h* del
+    caché cuando se conoce. El nodo conserva su h de la heurística, que es
+    la que usa delta para sus hijos.
+
+    """
+    h = nodo.h
+    if cache is not None:
+        h_estrella = cache.costo(nodo.estado)
+        if h_estrella is not None:
+            h = h_estrella
+    return nodo.costo + h, h
+
+
+@_con_estadisticas
+def busqueda_A_estrella(problema, s0, heuristica, cache=None, estadisticas=None):
     """
     Búsqueda A*
 
@@ -243,7 +1083,16 @@ def busqueda_A_estrella(problema, s0, heuristica):
     @param heuristica: Una funcion de heuristica, esto es, una función
                        heuristica(nodo), la cual devuelva un número mayor
                        o igual a cero con el costo esperado desde nodo hasta
-                       un nodo cuyo estado final sea méta.
+                       un nodo cuyo estado final sea méta. Si además tiene
+                       un atributo `delta` (ver NodoBusqueda.expande), la h
+                       de los hijos se calcula de forma incremental.
+    @param cache: Un CacheSoluciones opcional del mismo problema. Los
+                  estados que están ahí entran a la frontera con su
+                  costo exacto a la meta, y la búsqueda termina al extraer
+                  uno, completando el plan con el sufijo guardado. El plan
+                  encontrado se le enseña al caché al terminar.
+    @param estadisticas: Un EstadisticasBusqueda opcional que se llena
+                         durante la búsqueda.
 
     @return: Una tupla (plan, nodos_visitados) donde `plan` es un
              objeto `NodoBusqueda` que representa el plan completo y
@@ -251,34 +1100,1649 @@ def busqueda_A_estrella(problema, s0, heuristica):
              frontera durante la búsqueda.
 
     """
-    # Si el estado inicial ya es terminal, regresamos de inmediato.
+    return _agota(_pasos_A_estrella(problema, s0, heuristica, cache, estadisticas))
+
+
+def _pasos_A_estrella(problema, s0, heuristica, cache=None, estadisticas=None):
+    # Si no hay solución posible o el estado inicial ya es terminal,
+    # regresamos de inmediato.
+    if not problema.es_resoluble(s0):
+        return None, 0
+    if estadisticas is not None:
+        problema, heuristica = estadisticas.instrumenta(problema, heuristica)
     if problema.terminal(s0):
         return NodoBusqueda(s0), 1
 
-    # La frontera es una cola de prioridad ordenada por f(n) = g(n) + h(n)
-    frontera = []
+    # La frontera es una cola de prioridad ordenada por f(n) = g(n) + h(n),
+    # con empates rotos por h(n). Si un estado mejora mientras sigue en la
+    # frontera, su entrada anterior queda invalidada y no se vuelve a extraer.
+    frontera = ColaPrioridad()
     nodo_inicial = NodoBusqueda(s0)
-    heapq.heappush(frontera, (heuristica(nodo_inicial), nodo_inicial))
+    nodo_inicial.h = heuristica(nodo_inicial)
+    frontera.agrega(nodo_inicial, *_prioridad_A_estrella(nodo_inicial, cache))
 
     # `visitados` lleva el mejor costo g(n) conocido para cada estado.
-    visitados = {s0: 0}
+    visitados = problema.almacen()
+    visitados[s0] = 0
     nodos_visitados = 0
 
     while frontera:
-        _, plan = heapq.heappop(frontera)
+        plan = frontera.extrae()
         nodos_visitados += 1
 
-        # Si el estado del nodo actual es terminal, terminamos.
+        # Si el estado del nodo actual es terminal, terminamos. Un estado
+        # del caché sale con f = g + h* exacta y nadie en la frontera tiene
+        # una cota menor, así que su plan completo también es óptimo.
         if problema.terminal(plan.estado):
+            if cache is not None:
+                cache.aprende(plan)
+            return plan, nodos_visitados
+        if cache is not None and plan.estado in cache:
+            plan = cache.completa(plan)
+            cache.aprende(plan)
             return plan, nodos_visitados
 
         # Expandimos los sucesores del nodo actual.
-        for hijo in plan.expande(problema):
+        for hijo in plan.expande(problema, heuristica):
             costo_g = hijo.costo
-            if hijo.estado not in visitados or visitados[hijo.estado] > costo_g:
+            mejor_g = visitados.get(hijo.estado)
+            if mejor_g is None or mejor_g > costo_g:
                 visitados[hijo.estado] = costo_g
-                costo_f = costo_g + heuristica(hijo)
-                heapq.heappush(frontera, (costo_f, hijo))
+                if hijo.h is None:
+                    hijo.h = heuristica(hijo)
+                if estadisticas is not None:
+                    estadisticas.agregados += 1
+                    estadisticas.reaperturas += (mejor_g is not None and
+                                                 hijo.estado not in frontera)
+                if cache is None:
+                    frontera.agrega(hijo, costo_g + hijo.h, hijo.h)
+                else:
+                    frontera.agrega(hijo, *_prioridad_A_estrella(hijo, cache))
+        if estadisticas is not None:
+            estadisticas.observa(len(frontera), len(visitados))
+        yield len(frontera), len(visitados)
 
     # Si agotamos la frontera sin encontrar solución, devolvemos None.
     return None, nodos_visitados
+
+
+# ---------------------------------------------------------------------
+#
+# Búsquedas pausables
+#
+# Cada búsqueda de arriba está escrita como un generador _pasos_* que
+# cede el control después de cada expansión con el tamaño de la frontera
+# y de los visitados, y que al terminar regresa (plan, nodos_visitados).
+# La función pública solo lo corre hasta el final; BusquedaPausable lo
+# corre por bloques.
+#
+# ---------------------------------------------------------------------
+
+class BusquedaPausable:
+    """
+    Una búsqueda que avanza de a bloques de expansiones, se puede
+    consultar entre bloques y se puede cancelar.
+
+    Uso típico:
+
+        busqueda = BusquedaPausable(busqueda_A_estrella, pb, s0, h_2)
+        while not busqueda.avanza(1000):
+            print(busqueda.tam_frontera, busqueda.tam_cerrados)
+        plan, nodos_visitados = busqueda.resultado
+
+    Atributos:
+        expansiones: nodos expandidos hasta ahora.
+        tam_frontera, tam_cerrados: tamaño de la frontera y de los
+                                    visitados después del último paso.
+        terminada: si ya no se puede avanzar (terminó o se canceló).
+        cancelada: si se canceló antes de terminar.
+        resultado: (plan, nodos_visitados) al terminar, como lo regresa
+                   la función de búsqueda, o None.
+
+    """
+    def __init__(self, busqueda, problema, s0, *args, estadisticas=None, **kwargs):
+        """
+        @param busqueda: Una de las funciones de búsqueda pausables
+                         (ver BUSQUEDAS_PAUSABLES).
+        @param problema, s0, args, kwargs: Los argumentos de la búsqueda.
+        @param estadisticas: Un EstadisticasBusqueda opcional que se llena
+                             durante la búsqueda.
+
+        """
+        pasos = _PASOS.get(busqueda)
+        if pasos is None:
+            raise ValueError(f"La búsqueda {busqueda.__name__} no es pausable")
+        self._pasos = pasos(problema, s0, *args, estadisticas=estadisticas, **kwargs)
+        self.estadisticas = estadisticas
+        self.expansiones = 0
+        self.tam_frontera = 1
+        self.tam_cerrados = 1
+        self.terminada = False
+        self.cancelada = False
+        self.resultado = None
+
+    def avanza(self, expansiones=1000):
+        """
+        Avanza la búsqueda a lo más `expansiones` nodos.
+
+        @return: True si la búsqueda ya terminó.
+
+        """
+        if self.terminada:
+            return True
+        inicio = time.perf_counter()
+        siguiente = self._pasos.__next__
+        hechas = 0
+        try:
+            while hechas < expansiones:
+                self.tam_frontera, self.tam_cerrados = siguiente()
+                hechas += 1
+        except StopIteration as fin:
+            self.resultado = fin.value
+            self.terminada = True
+        finally:
+            self.expansiones += hechas
+            if self.estadisticas is not None:
+                _suma_tiempo_total(self.estadisticas, time.perf_counter() - inicio)
+        return self.terminada
+
+    def corre(self):
+        """
+        Avanza la búsqueda hasta el final.
+
+        @return: El resultado (plan, nodos_visitados), o None si se canceló.
+
+        """
+        while not self.avanza():
+            pass
+        return self.resultado
+
+    def cancela(self):
+        """
+        Abandona la búsqueda y libera su frontera y sus visitados.
+
+        """
+        if not self.terminada:
+            self._pasos.close()
+            self.terminada = self.cancelada = True
+        self._pasos = None
+
+
+_PASOS = {
+    busqueda_ancho: _pasos_ancho,
+    busqueda_profundo: _pasos_profundo,
+    busqueda_profundidad_iterativa: _pasos_profundidad_iterativa,
+    busqueda_costo_uniforme: _pasos_costo_uniforme,
+    busqueda_A_estrella: _pasos_A_estrella,
+}
+BUSQUEDAS_PAUSABLES = tuple(_PASOS)
+
+
+async def resuelve_async(busqueda, problema, s0, *args, expansiones=1000, **kwargs):
+    """
+    Corre una búsqueda pausable dentro de asyncio, cediendo el control al
+    ciclo de eventos cada `expansiones` nodos, de forma que un solo
+    proceso puede atender muchas búsquedas a la vez:
+
+        resultados = await asyncio.gather(
+            *(resuelve_async(busqueda_A_estrella, pb, s0, h_2) for s0 in estados))
+
+    Si la tarea se cancela, la búsqueda se cancela también.
+
+    @param busqueda: Una de las funciones de BUSQUEDAS_PAUSABLES.
+    @param expansiones: Nodos a expandir entre cada cesión de control.
+    @return: (plan, nodos_visitados) como la búsqueda.
+
+    """
+    pausable = BusquedaPausable(busqueda, problema, s0, *args, **kwargs)
+    try:
+        while not pausable.avanza(expansiones):
+            await asyncio.sleep(0)
+    finally:
+        pausable.cancela()
+    return pausable.resultado
+
+
+class BusquedaReanudable:
+    """
+    UCS (o A* si se da una heurística) que se puede respaldar en disco y
+    continuar después exactamente donde se quedó, incluso en otro proceso.
+
+    Los nodos no son objetos NodoBusqueda sino renglones de una tabla plana:
+    el nodo i tiene estado estados[i], padre padres[i] (el índice del nodo
+    padre, -1 en la raíz), acción acciones[indices_accion[i]], costo
+    costos[i] y heurística hs[i]. Los costos son enteros hasta que aparece
+    uno que no lo es, y desde ahí flotantes, para que el plan tenga el mismo
+    tipo de costo que con busqueda_A_estrella. La tabla solo crece: al
+    encontrar un mejor camino a un estado se agrega un nodo nuevo, así que
+    el último nodo de cada estado es el de menor costo y los visitados se
+    reconstruyen de la tabla. La frontera es un heap de tuplas (f, h, i), y
+    los empates se rompen igual que en busqueda_costo_uniforme y
+    busqueda_A_estrella, por lo que expanden los mismos nodos.
+
+    Cada respaldo agrega a `ruta + '.nodos'` solo los nodos nuevos desde el
+    anterior y reescribe `ruta` con la frontera (índices de nodos) y los
+    contadores, así que cuesta lo que creció la tabla más el tamaño de la
+    frontera. `ruta` se reemplaza de forma atómica al final, de modo que si
+    el proceso muere a la mitad queda el respaldo anterior.
+
+    """
+    def __init__(self, problema, s0, heuristica=None):
+        """
+        @param problema: Un objeto de una clase heredada de ProblemaBusqueda
+        @param s0: El estado inicial.
+        @param heuristica: Una función heuristica(nodo) como en A*, o None
+                           para búsqueda de costo uniforme.
+
+        """
+        self._vacia(problema, heuristica)
+        if not problema.es_resoluble(s0):
+            self.terminada = True
+            self.resultado = None, 0
+            return
+        h = 0 if heuristica is None else heuristica(NodoBusqueda(s0))
+        self._agrega(s0, None, -1, 0, h)
+
+    def _vacia(self, problema, heuristica):
+        self.problema = problema
+        self.heuristica = heuristica
+        self.estados = []
+        self.padres = array('q')
+        self.indices_accion = array('I')
+        self.acciones = []
+        self._indice_de_accion = {}
+        self.costos = array('q')
+        self.hs = array('d')
+        self.mejor = {}
+        self.frontera = []
+        self._expandidos = bytearray()
+        self.tam_frontera = 0
+        self.nodos_visitados = 0
+        self.terminada = False
+        self.resultado = None
+        self._meta = None
+        self._ruta = None
+        self._guardados = 0
+        self._bytes_nodos = 0
+
+    @property
+    def tam_cerrados(self):
+        return len(self.mejor)
+
+    def _agrega(self, estado, accion, padre, costo, h):
+        i = len(self.estados)
+        previo = self.mejor.get(estado)
+        if previo is None or self._expandidos[previo]:
+            self.tam_frontera += 1
+        indice = self._indice_de_accion.get(accion)
+        if indice is None:
+            indice = self._indice_de_accion[accion] = len(self.acciones)
+            self.acciones.append(accion)
+        self.estados.append(estado)
+        self.padres.append(padre)
+        self.indices_accion.append(indice)
+        if self.costos.typecode == 'q' and not isinstance(costo, int):
+            self.costos = array('d', self.costos)
+        self.costos.append(costo)
+        self.hs.append(h)
+        self._expandidos.append(0)
+        self.mejor[estado] = i
+        heapq.heappush(self.frontera, (costo + h, h, i))
+
+    def nodo(self, i):
+        """
+        @return: El NodoBusqueda con el plan que termina en el nodo i.
+
+        """
+        camino = []
+        while i >= 0:
+            camino.append(i)
+            i = self.padres[i]
+        nodo = None
+        for j in reversed(camino):
+            nodo = NodoBusqueda(self.estados[j], self.acciones[self.indices_accion[j]], nodo)
+            nodo.costo = self.costos[j]
+        return nodo
+
+    def avanza(self, expansiones=1000):
+        """
+        Avanza la búsqueda a lo más `expansiones` nodos.
+
+        @return: True si la búsqueda ya terminó. Entonces `resultado` es
+                 (plan, nodos_visitados) como en busqueda_A_estrella.
+
+        """
+        if self.terminada:
+            return True
+        problema, heuristica = self.problema, self.heuristica
+        # self.costos puede cambiar de tipo en _agrega, así que no se guarda
+        # en una variable local.
+        estados, mejor, frontera = self.estados, self.mejor, self.frontera
+        for _ in range(expansiones):
+            while frontera:
+                _, h, i = heapq.heappop(frontera)
+                if mejor[estados[i]] == i:
+                    break
+            else:
+                self.terminada = True
+                self.resultado = None, self.nodos_visitados
+                return True
+            self.nodos_visitados += 1
+            self._expandidos[i] = 1
+            self.tam_frontera -= 1
+            estado = estados[i]
+            if problema.terminal(estado):
+                self._meta = i
+                self.terminada = True
+                self.resultado = self.nodo(i), self.nodos_visitados
+                return True
+            padre = NodoBusqueda(estado)
+            padre.costo = self.costos[i]
+            padre.h = h if heuristica is not None else None
+            for hijo in padre.expande(problema, heuristica):
+                previo = mejor.get(hijo.estado)
+                if previo is None or self.costos[previo] > hijo.costo:
+                    if heuristica is None:
+                        hijo.h = 0
+                    elif hijo.h is None:
+                        hijo.h = heuristica(hijo)
+                    self._agrega(hijo.estado, hijo.accion, i, hijo.costo, hijo.h)
+        return False
+
+    def guarda(self, ruta):
+        """
+        Respalda la búsqueda en `ruta` y `ruta + '.nodos'`.
+
+        """
+        if ruta != self._ruta:
+            self._ruta, self._guardados, self._bytes_nodos = ruta, 0, 0
+        n = len(self.estados)
+        with open(ruta + '.nodos', 'r+b' if self._bytes_nodos else 'wb') as archivo:
+            archivo.seek(self._bytes_nodos)
+            archivo.truncate()
+            desde = self._guardados
+            pickle.dump((self.estados[desde:], self.padres[desde:],
+                         self.indices_accion[desde:], self.costos[desde:],
+                         self.hs[desde:]),
+                        archivo, protocol=pickle.HIGHEST_PROTOCOL)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+            self._bytes_nodos = archivo.tell()
+        self._guardados = n
+        estados, mejor = self.estados, self.mejor
+        vivos = array('q', (i for _, _, i in self.frontera
+                            if mejor[estados[i]] == i and not self._expandidos[i]))
+        datos = {'nodos': n, 'bytes_nodos': self._bytes_nodos,
+                 'acciones': self.acciones, 'frontera': vivos,
+                 'nodos_visitados': self.nodos_visitados,
+                 'terminada': self.terminada, 'meta': self._meta}
+        temporal = ruta + '.tmp'
+        with open(temporal, 'wb') as archivo:
+            pickle.dump(datos, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def carga(cls, ruta, problema, heuristica=None):
+        """
+        Continúa una búsqueda respaldada con guarda.
+
+        @param ruta: La ruta con que se respaldó.
+        @param problema, heuristica: Los mismos de la búsqueda original.
+        @return: Un objeto BusquedaReanudable listo para seguir avanzando.
+
+        """
+        with open(ruta, 'rb') as archivo:
+            datos = pickle.load(archivo)
+        busqueda = cls.__new__(cls)
+        busqueda._vacia(problema, heuristica)
+        with open(ruta + '.nodos', 'rb') as archivo:
+            while archivo.tell() < datos['bytes_nodos']:
+                estados, padres, indices, costos, hs = pickle.load(archivo)
+                busqueda.estados.extend(estados)
+                busqueda.padres.extend(padres)
+                busqueda.indices_accion.extend(indices)
+                if costos.typecode != busqueda.costos.typecode:
+                    busqueda.costos = array('d', busqueda.costos)
+                    costos = array('d', costos)
+                busqueda.costos.extend(costos)
+                busqueda.hs.extend(hs)
+        n = datos['nodos']
+        if len(busqueda.estados) != n:
+            raise ValueError(f"Respaldo de búsqueda corrupto en {ruta}")
+        busqueda.acciones = datos['acciones']
+        busqueda._indice_de_accion = {accion: i for i, accion in enumerate(busqueda.acciones)}
+        busqueda.mejor = dict(zip(busqueda.estados, range(n)))
+        busqueda._expandidos = bytearray(b'\x01') * n
+        costos, hs = busqueda.costos, busqueda.hs
+        for i in datos['frontera']:
+            busqueda._expandidos[i] = 0
+            busqueda.frontera.append((costos[i] + hs[i], hs[i], i))
+        heapq.heapify(busqueda.frontera)
+        busqueda.tam_frontera = len(datos['frontera'])
+        busqueda.nodos_visitados = datos['nodos_visitados']
+        busqueda.terminada = datos['terminada']
+        busqueda._meta = datos['meta']
+        if busqueda.terminada:
+            plan = None if busqueda._meta is None else busqueda.nodo(busqueda._meta)
+            busqueda.resultado = plan, busqueda.nodos_visitados
+        busqueda._ruta, busqueda._guardados, busqueda._bytes_nodos = ruta, n, datos['bytes_nodos']
+        return busqueda
+
+
+def busqueda_con_respaldo(problema, s0, ruta, heuristica=None, cada=100000):
+    """
+    Búsqueda de costo uniforme (o A* si se da heurística) que se respalda
+    en `ruta` cada `cada` expansiones. Si ya hay un respaldo en `ruta`, en
+    lugar de empezar de nuevo continúa desde él (ver BusquedaReanudable).
+
+    @param problema: Un objeto de una clase heredada de ProblemaBusqueda
+    @param ruta: Archivo del respaldo (se usa también `ruta + '.nodos'`).
+    @param heuristica: Una función heuristica(nodo), o None.
+    @param cada: Número de expansiones entre respaldos.
+
+    @return: Una tupla (plan, nodos_visitados) como en busqueda_A_estrella.
+
+    """
+    if os.path.exists(ruta):
+        busqueda = BusquedaReanudable.carga(ruta, problema, heuristica)
+        if busqueda.estados and busqueda.estados[0] != s0:
+            raise ValueError(f"El respaldo en {ruta} es de otro estado inicial")
+    else:
+        busqueda = BusquedaReanudable(problema, s0, heuristica)
+    while not busqueda.avanza(cada):
+        busqueda.guarda(ruta)
+    busqueda.guarda(ruta)
+    return busqueda.resultado
+
+
+def _ara_estrella(problema, s0, heuristica, peso, paso, max_expansiones,
+                  max_segundos, cuenta, estadisticas=None):
+    """
+    ARA*: A* ponderado que se repite bajando el peso y reusando lo ya
+    buscado. Genera (plan, cota) cada vez que termina con un peso, donde
+    plan.costo <= cota * costo óptimo. Se detiene al llegar a peso 1, al
+    agotar el presupuesto (generando antes el mejor plan que tenga), o si
+    no hay solución. `cuenta` es una lista
+    de un elemento donde se van contando los nodos expandidos.
+
+    """
+    limite = math.inf if max_segundos is None else time.perf_counter() + max_segundos
+    inicial = NodoBusqueda(s0)
+    inicial.h = heuristica(inicial)
+    if problema.terminal(s0):
+        cuenta[0] += 1
+        yield inicial, 1.0
+        return
+
+    # `mejor` tiene el nodo de menor g conocido de cada estado. Un estado
+    # que mejora después de expandirse con el peso actual no se vuelve a
+    # abrir: se guarda en `inconsistentes` para la siguiente vuelta.
+    mejor = {s0: inicial}
+    abiertos = ColaPrioridad()
+    abiertos.agrega(inicial, peso * inicial.h, inicial.h)
+    cerrados = set()
+    inconsistentes = {}
+    incumbente = None
+    cota_previa = math.inf
+
+    while True:
+        agotado = False
+        while abiertos and (incumbente is None or incumbente.costo > abiertos.minimo()):
+            if ((max_expansiones is not None and cuenta[0] >= max_expansiones)
+                    or time.perf_counter() > limite):
+                agotado = True
+                break
+            nodo = abiertos.extrae()
+            cuenta[0] += 1
+            cerrados.add(nodo.estado)
+            for hijo in nodo.expande(problema, heuristica):
+                previo = mejor.get(hijo.estado)
+                if previo is not None and previo.costo <= hijo.costo:
+                    continue
+                mejor[hijo.estado] = hijo
+                if hijo.h is None:
+                    hijo.h = heuristica(hijo)
+                # Una meta vale f = g, así que basta guardar la mejor.
+                if problema.terminal(hijo.estado):
+                    if incumbente is None or hijo.costo < incumbente.costo:
+                        incumbente = hijo
+                elif hijo.estado in cerrados:
+                    inconsistentes[hijo.estado] = hijo
+                else:
+                    abiertos.agrega(hijo, hijo.costo + peso * hijo.h, hijo.h)
+                    if estadisticas is not None:
+                        estadisticas.agregados += 1
+            if estadisticas is not None:
+                estadisticas.observa(len(abiertos), len(mejor))
+        if incumbente is None:
+            return
+
+        # Todo plan que falte pasa por un abierto o un inconsistente, así
+        # que el menor g + h de ellos es una cota inferior del óptimo. Si
+        # se acabó el presupuesto a media vuelta, el peso actual todavía
+        # no garantiza nada y solo vale la cota de la vuelta anterior.
+        pendientes = [entrada[-1] for entrada in abiertos.entradas.values()]
+        pendientes.extend(inconsistentes.values())
+        cota_inferior = min((nodo.costo + nodo.h for nodo in pendientes), default=math.inf)
+        tope = cota_previa if agotado else peso
+        if cota_inferior >= incumbente.costo:
+            cota = 1.0
+        else:
+            cota = min(tope, incumbente.costo / cota_inferior) if cota_inferior > 0 else tope
+        yield incumbente, cota
+        if agotado or cota <= 1 or paso is None:
+            return
+        cota_previa = cota
+
+        peso = max(1.0, peso - paso)
+        abiertos = ColaPrioridad()
+        for nodo in pendientes:
+            abiertos.agrega(nodo, nodo.costo + peso * nodo.h, nodo.h)
+        cerrados = set()
+        inconsistentes = {}
+
+
+@_con_estadisticas
+def busqueda_A_estrella_ponderada(problema, s0, heuristica, peso=2.0,
+                                  max_expansiones=None, max_segundos=None,
+                                  estadisticas=None):
+    """
+    A* ponderado: ordena la frontera por f(n) = g(n) + peso * h(n).
+
+    Con una heurística admisible el plan cuesta a lo más peso veces el
+    óptimo, y en general expande muchos menos nodos que A*. Los estados
+    ya expandidos no se vuelven a abrir.
+
+    @param problema: Un objeto de una clase heredada de ProblemaBusqueda
+    @param heuristica: Una función heuristica(nodo), como en A*.
+    @param peso: El peso w >= 1 de la heurística.
+    @param max_expansiones: Máximo de nodos a expandir, o None.
+    @param max_segundos: Máximo tiempo de reloj, o None.
+    @param estadisticas: Un EstadisticasBusqueda opcional que se llena
+                         durante la búsqueda.
+
+    @return: Una tupla (plan, nodos_visitados), con plan None si no hay
+             solución o se acabó el presupuesto antes de encontrar alguna.
+             Si el presupuesto se acaba con una meta ya generada, se
+             regresa el mejor plan que se tenga:
+
+    >>> from problemas import PbCamionMagico
+    >>> plan, _ = busqueda_A_estrella_ponderada(
+    ...     PbCamionMagico(100), 1, lambda nodo: 0, peso=1.0, max_expansiones=41)
+    >>> plan.costo
+    13
+
+    """
+    if not problema.es_resoluble(s0):
+        return None, 0
+    if estadisticas is not None:
+        problema, heuristica = estadisticas.instrumenta(problema, heuristica)
+    cuenta = [0]
+    for plan, _ in _ara_estrella(problema, s0, heuristica, peso, None,
+                                 max_expansiones, max_segundos, cuenta, estadisticas):
+        return plan, cuenta[0]
+    return None, cuenta[0]
+
+
+def busqueda_ARA_estrella(problema, s0, heuristica, peso=3.0, paso=0.5,
+                          max_expansiones=None, max_segundos=None,
+                          estadisticas=None):
+    """
+    A* de reparación en cualquier momento (ARA*), como generador.
+
+    Empieza como A* ponderado con `peso` y, cada vez que encuentra un
+    plan, baja el peso en `paso` y continúa desde la frontera que ya tenía
+    (sin repetir lo que sigue siendo válido) hasta llegar a A* con peso 1.
+    Cada plan viene con una cota de subóptimo: su costo es a lo más
+    cota veces el óptimo. El generador termina cuando el plan es óptimo,
+    cuando se acaba el presupuesto (después de generar el mejor plan que
+    tenga, si ya encontró alguno), o de inmediato si no hay solución.
+
+    Uso típico, quedarse con el último plan al acabar el tiempo:
+
+        for plan, costo, cota in busqueda_ARA_estrella(pb, s0, h, max_segundos=0.05):
+            mejor = plan
+
+    @param problema: Un objeto de una clase heredada de ProblemaBusqueda
+    @param heuristica: Una función heuristica(nodo) admisible, como en A*.
+    @param peso: El peso inicial w >= 1 de la heurística.
+    @param paso: Cuánto baja el peso después de cada plan.
+    @param max_expansiones: Máximo de nodos a expandir en total, o None.
+    @param max_segundos: Máximo tiempo de reloj en total, o None.
+    @param estadisticas: Un EstadisticasBusqueda opcional que se llena
+                         durante la búsqueda. El tiempo total solo cuenta
+                         lo que el generador corre, no lo que se tarda
+                         quien lo consume entre un plan y otro.
+
+    @return: Un generador de tuplas (plan, costo, cota), con planes cada
+             vez mejores (o con mejor cota).
+
+    """
+    if not problema.es_resoluble(s0):
+        return
+    if estadisticas is not None:
+        problema, heuristica = estadisticas.instrumenta(problema, heuristica)
+    inicio = time.perf_counter()
+    for plan, cota in _ara_estrella(problema, s0, heuristica, peso, paso,
+                                    max_expansiones, max_segundos, [0], estadisticas):
+        if estadisticas is not None:
+            _suma_tiempo_total(estadisticas, time.perf_counter() - inicio)
+        yield plan, plan.costo, cota
+        inicio = time.perf_counter()
+    if estadisticas is not None:
+        _suma_tiempo_total(estadisticas, time.perf_counter() - inicio)
+
+
+@_con_estadisticas
+def busqueda_IDA_estrella(problema, s0, heuristica, estadisticas=None):
+    """
+    Búsqueda IDA* (A* por profundización iterativa)
+
+    Hace búsquedas a profundidad acotadas por f(n) = g(n) + h(n), subiendo
+    la cota al menor f que la rebasó en la iteración anterior. Solo se
+    guarda el camino actual (con un generador de sucesores por nivel) y el
+    conjunto de estados en ese camino para evitar ciclos, por lo que la
+    memoria es lineal en la profundidad de la solución.
+
+    @param problema: Un objeto de una clase heredada de ProblemaBusqueda
+    @param heuristica: Una funcion de heuristica(nodo) admisible.
+    @param estadisticas: Un EstadisticasBusqueda opcional que se llena
+                         durante la búsqueda.
+
+    @return: Una tupla (plan, nodos_visitados) igual que busqueda_A_estrella.
+
+    """
+    if not problema.es_resoluble(s0):
+        return None, 0
+    if estadisticas is not None:
+        problema, heuristica = estadisticas.instrumenta(problema, heuristica)
+    raiz = NodoBusqueda(s0)
+    nodos_visitados = 1
+    if problema.terminal(s0):
+        return raiz, nodos_visitados
+
+    cota = raiz.h = heuristica(raiz)
+    while cota < math.inf:
+        siguiente_cota = math.inf
+        en_camino = {s0}
+        pila = [(raiz, raiz.expande(problema, heuristica))]
+        while pila:
+            nodo, sucesores = pila[-1]
+            hijo = next(sucesores, None)
+            if hijo is None:
+                pila.pop()
+                en_camino.discard(nodo.estado)
+                continue
+            if hijo.estado in en_camino:
+                continue
+            if hijo.h is None:
+                hijo.h = heuristica(hijo)
+            costo_f = hijo.costo + hijo.h
+            if costo_f > cota:
+                siguiente_cota = min(siguiente_cota, costo_f)
+                continue
+            nodos_visitados += 1
+            if problema.terminal(hijo.estado):
+                return hijo, nodos_visitados
+            en_camino.add(hijo.estado)
+            pila.append((hijo, hijo.expande(problema, heuristica)))
+            if estadisticas is not None:
+                estadisticas.agregados += 1
+                estadisticas.observa(len(pila), len(en_camino))
+        cota = siguiente_cota
+    return None, nodos_visitados
+
+
+class _NodoSMA(NodoBusqueda):
+    """
+    Nodo del árbol que mantiene en memoria busqueda_A_estrella_memoria.
+
+    Además de los campos de NodoBusqueda guarda su f (con pathmax), los
+    hijos que siguen en memoria, el menor f de los hijos olvidados y el
+    turno de su entrada vigente en la frontera (None si no está en ella).
+
+    """
+    __slots__ = ('f', 'hijos', 'olvidado', 'turno')
+
+    def __init__(self, estado, accion=None, padre=None, costo_local=0):
+        super().__init__(estado, accion, padre, costo_local)
+        self.f = 0
+        self.hijos = {}
+        self.olvidado = math.inf
+        self.turno = None
+
+
+@_con_estadisticas
+def busqueda_A_estrella_memoria(problema, s0, heuristica, max_nodos=100000,
+                                estadisticas=None):
+    """
+    Búsqueda A* con memoria acotada (SMA* simplificado)
+
+    Mantiene a lo más `max_nodos` nodos en memoria. Cuando se rebasa,
+    olvida la hoja con mayor f (la menos profunda en caso de empate) y
+    guarda ese f en su padre, que regresa a la frontera para regenerar
+    más adelante los hijos olvidados. Los nodos que llegan a la máxima
+    profundidad que cabe en memoria sin ser meta reciben f infinito.
+
+    @param problema: Un objeto de una clase heredada de ProblemaBusqueda
+    @param heuristica: Una funcion de heuristica(nodo) admisible.
+    @param max_nodos: Número máximo de nodos que se guardan en memoria.
+    @param estadisticas: Un EstadisticasBusqueda opcional que se llena
+                         durante la búsqueda.
+
+    @return: Una tupla (plan, nodos_visitados) igual que busqueda_A_estrella.
+
+    """
+    if max_nodos < 2:
+        raise ValueError("max_nodos debe ser al menos 2")
+    if not problema.es_resoluble(s0):
+        return None, 0
+    if estadisticas is not None:
+        problema, heuristica = estadisticas.instrumenta(problema, heuristica)
+
+    turnos = itertools.count()
+    mejores, peores = [], []
+
+    def abre(nodo):
+        nodo.turno = turno = next(turnos)
+        heapq.heappush(mejores, (nodo.f, -nodo.profundidad, turno, nodo))
+        if not nodo.hijos:
+            heapq.heappush(peores, (-nodo.f, nodo.profundidad, turno, nodo))
+
+    def olvida_peor():
+        while peores:
+            _, _, turno, nodo = heapq.heappop(peores)
+            if nodo.turno == turno and not nodo.hijos and nodo.padre is not None:
+                break
+        else:
+            return False
+        nodo.turno = None
+        padre = nodo.padre
+        del padre.hijos[nodo.estado]
+        padre.olvidado = min(padre.olvidado, nodo.f)
+        if padre.turno is None or padre.f != padre.olvidado or not padre.hijos:
+            padre.f = padre.olvidado
+            abre(padre)
+        return True
+
+    raiz = _NodoSMA(s0)
+    raiz.f = heuristica(raiz)
+    abre(raiz)
+    en_memoria = 1
+    nodos_visitados = 0
+
+    while mejores:
+        f, _, turno, plan = heapq.heappop(mejores)
+        if plan.turno != turno:
+            continue
+        if f == math.inf:
+            break
+        plan.turno = None
+        nodos_visitados += 1
+        if problema.terminal(plan.estado):
+            return plan, nodos_visitados
+
+        # Solo se regeneran los hijos que no siguen en memoria, evitando
+        # los estados que ya están en el camino desde la raíz.
+        en_camino = set()
+        ancestro = plan.padre
+        while ancestro is not None:
+            en_camino.add(ancestro.estado)
+            ancestro = ancestro.padre
+        for hijo in plan.expande(problema):
+            if hijo.estado in plan.hijos or hijo.estado in en_camino:
+                continue
+            hijo = _NodoSMA(hijo.estado, hijo.accion, plan, hijo.costo - plan.costo)
+            if (hijo.profundidad >= max_nodos - 1
+                    and not problema.terminal(hijo.estado)):
+                hijo.f = math.inf
+            else:
+                hijo.f = max(plan.f, hijo.costo + heuristica(hijo))
+            plan.hijos[hijo.estado] = hijo
+            en_memoria += 1
+            abre(hijo)
+            if estadisticas is not None:
+                estadisticas.agregados += 1
+        plan.olvidado = math.inf
+        if not plan.hijos:
+            plan.f = math.inf
+            abre(plan)
+
+        while en_memoria > max_nodos and olvida_peor():
+            en_memoria -= 1
+        if estadisticas is not None:
+            estadisticas.observa(len(mejores), en_memoria)
+
+    return None, nodos_visitados
+
+
+def _expande_atras(nodo, problema):
+    """
+    Genera los nodos predecesores de nodo en una búsqueda hacia atrás.
+
+    En el árbol hacia atrás el padre de un nodo es el estado más cercano a
+    la meta, y la acción guardada es la que lleva del nodo a su padre.
+
+    """
+    for estado_previo, accion, costo_local in problema.predecesores(nodo.estado):
+        yield NodoBusqueda(estado_previo, accion, nodo, costo_local)
+
+
+def _une_planes(nodo_adelante, nodo_atras):
+    """
+    Une el camino hacia adelante hasta un estado con el camino hacia atrás
+    desde ese mismo estado, en un solo NodoBusqueda que va de s0 a la meta.
+
+    """
+    plan = nodo_adelante
+    while nodo_atras.padre is not None:
+        siguiente = nodo_atras.padre
+        plan = NodoBusqueda(siguiente.estado, nodo_atras.accion, plan,
+                            nodo_atras.costo - siguiente.costo)
+        nodo_atras = siguiente
+    return plan
+
+
+@_con_estadisticas
+def busqueda_ancho_bidireccional(problema, s0, estadisticas=None):
+    """
+    Búsqueda a lo ancho bidireccional
+
+    Crece una capa completa a la vez desde s0 o desde las metas (la del
+    lado con frontera más pequeña) hasta que los dos lados se tocan, de
+    forma que se generan del orden de 2·b^(d/2) nodos en lugar de b^d.
+    Si el problema no define predecesores y metas se usa busqueda_ancho.
+
+    @param problema: Un objeto de una clase heredada de ProblemaBusqueda
+    @param estadisticas: Un EstadisticasBusqueda opcional que se llena
+                         durante la búsqueda.
+
+    @return: Una tupla (plan, nodos_visitados) igual que busqueda_ancho.
+
+    """
+    if not problema.es_resoluble(s0):
+        return None, 0
+    if not (_implementa(problema, 'predecesores') and _implementa(problema, 'metas')):
+        return busqueda_ancho(problema, s0, estadisticas=estadisticas)
+    if estadisticas is not None:
+        problema, _ = estadisticas.instrumenta(problema)
+
+    nodos_visitados = 1
+    if problema.terminal(s0):
+        return NodoBusqueda(s0), nodos_visitados
+
+    visitados_adelante = {s0: NodoBusqueda(s0)}
+    visitados_atras = {meta: NodoBusqueda(meta) for meta in problema.metas()}
+    capa_adelante = list(visitados_adelante.values())
+    capa_atras = list(visitados_atras.values())
+
+    while capa_adelante and capa_atras:
+        hacia_adelante = len(capa_adelante) <= len(capa_atras)
+        if hacia_adelante:
+            capa, propios, otros = capa_adelante, visitados_adelante, visitados_atras
+        else:
+            capa, propios, otros = capa_atras, visitados_atras, visitados_adelante
+
+        # Se termina la capa completa antes de decidir, para quedarnos con
+        # el encuentro de menor profundidad total.
+        nueva_capa, mejor = [], None
+        for nodo in capa:
+            hijos = (nodo.expande(problema) if hacia_adelante
+                     else _expande_atras(nodo, problema))
+            for hijo in hijos:
+                if hijo.estado in propios:
+                    continue
+                nodos_visitados += 1
+                propios[hijo.estado] = hijo
+                nueva_capa.append(hijo)
+                if estadisticas is not None:
+                    estadisticas.agregados += 1
+                otro = otros.get(hijo.estado)
+                if otro is not None and (
+                        mejor is None or
+                        hijo.profundidad + otro.profundidad <
+                        mejor[0].profundidad + mejor[1].profundidad):
+                    mejor = (hijo, otro)
+        if estadisticas is not None:
+            estadisticas.observa(len(nueva_capa),
+                                 len(visitados_adelante) + len(visitados_atras))
+        if mejor is not None:
+            hijo, otro = mejor
+            if hacia_adelante:
+                return _une_planes(hijo, otro), nodos_visitados
+            return _une_planes(otro, hijo), nodos_visitados
+
+        if hacia_adelante:
+            capa_adelante = nueva_capa
+        else:
+            capa_atras = nueva_capa
+    return None, nodos_visitados
+
+
+@_con_estadisticas
+def busqueda_costo_uniforme_bidireccional(problema, s0, estadisticas=None):
+    """
+    Búsqueda por costo uniforme bidireccional (MM con heurística cero)
+
+    Avanza el lado cuya frontera tiene el menor costo g y guarda el mejor
+    costo de un camino completo visto al tocarse los dos lados. Termina
+    cuando la suma de los mínimos de las dos fronteras ya no puede mejorar
+    ese costo. Si el problema no define predecesores y metas se usa
+    busqueda_costo_uniforme.
+
+    @param problema: Un objeto de una clase heredada de ProblemaBusqueda
+    @param estadisticas: Un EstadisticasBusqueda opcional que se llena
+                         durante la búsqueda.
+
+    @return: Una tupla (plan, nodos_visitados) igual que busqueda_costo_uniforme.
+
+    """
+    if not problema.es_resoluble(s0):
+        return None, 0
+    if not (_implementa(problema, 'predecesores') and _implementa(problema, 'metas')):
+        return busqueda_costo_uniforme(problema, s0, estadisticas=estadisticas)
+    if estadisticas is not None:
+        problema, _ = estadisticas.instrumenta(problema)
+
+    if problema.terminal(s0):
+        return NodoBusqueda(s0), 1
+
+    visitados_adelante = {s0: NodoBusqueda(s0)}
+    visitados_atras = {meta: NodoBusqueda(meta) for meta in problema.metas()}
+    frontera_adelante, frontera_atras = ColaPrioridad(), ColaPrioridad()
+    for nodo in visitados_adelante.values():
+        frontera_adelante.agrega(nodo, 0)
+    for nodo in visitados_atras.values():
+        frontera_atras.agrega(nodo, 0)
+
+    mejor_costo, mejor = math.inf, None
+    nodos_visitados = 0
+    while frontera_adelante and frontera_atras:
+        min_adelante, min_atras = frontera_adelante.minimo(), frontera_atras.minimo()
+        if min_adelante + min_atras >= mejor_costo:
+            break
+        hacia_adelante = min_adelante <= min_atras
+        if hacia_adelante:
+            frontera, propios, otros = frontera_adelante, visitados_adelante, visitados_atras
+        else:
+            frontera, propios, otros = frontera_atras, visitados_atras, visitados_adelante
+
+        plan = frontera.extrae()
+        nodos_visitados += 1
+        hijos = (plan.expande(problema) if hacia_adelante
+                 else _expande_atras(plan, problema))
+        for hijo in hijos:
+            if hijo.estado in propios and propios[hijo.estado].costo <= hijo.costo:
+                continue
+            if estadisticas is not None:
+                estadisticas.agregados += 1
+                estadisticas.reaperturas += (hijo.estado in propios and
+                                             hijo.estado not in frontera)
+            propios[hijo.estado] = hijo
+            frontera.agrega(hijo, hijo.costo)
+            otro = otros.get(hijo.estado)
+            if otro is not None and hijo.costo + otro.costo < mejor_costo:
+                mejor_costo = hijo.costo + otro.costo
+                mejor = (hijo, otro) if hacia_adelante else (otro, hijo)
+        if estadisticas is not None:
+            estadisticas.observa(len(frontera_adelante) + len(frontera_atras),
+                                 len(visitados_adelante) + len(visitados_atras))
+
+    if mejor is None:
+        return None, nodos_visitados
+    return _une_planes(*mejor), nodos_visitados
+
+
+# ---------------------------------------------------------------------
+#
+# Búsquedas por lotes con NumPy
+#
+# En lugar de expandir nodo por nodo, se expanden capas enteras de
+# estados guardados como renglones de un ndarray. El problema debe tener:
+#
+#   sucesores_lote(estados) -> (hijos, padres): todos los sucesores de
+#       los renglones de `estados`, y para cada hijo el renglón de su padre.
+#   terminal_lote(estados) -> arreglo booleano.
+#   rango_lote(estados) -> arreglo de enteros en range(tamano_rango), un
+#       hash perfecto de los estados (y el atributo tamano_rango).
+#
+# Todas las acciones deben costar 1. Los visitados son un arreglo
+# indexado por rango, y los repetidos de una misma capa se quitan con
+# np.unique.
+#
+# ---------------------------------------------------------------------
+
+def _requiere_numpy(nombre):
+    if np is None:
+        raise ImportError(f"{nombre} necesita NumPy")
+
+
+def _requiere_lote(problema, nombre):
+    faltan = [metodo for metodo in ('sucesores_lote', 'terminal_lote',
+                                    'rango_lote', 'tamano_rango')
+              if not hasattr(problema, metodo)]
+    if faltan:
+        raise TypeError(f"{nombre} necesita un problema con {', '.join(faltan)}"
+                        f" ({type(problema).__name__} no los tiene)")
+
+
+def _a_tupla(renglon):
+    return tuple(int(x) for x in renglon)
+
+
+def _plan_de_estados(problema, estados):
+    """
+    NodoBusqueda que recorre la lista de estados dada, buscando en cada
+    paso la acción que lleva de un estado al siguiente.
+
+    """
+    nodo = NodoBusqueda(estados[0])
+    for estado in estados[1:]:
+        for accion in problema.acciones(nodo.estado):
+            sucesor, costo_local = problema.sucesor(nodo.estado, accion)
+            if sucesor == estado:
+                break
+        nodo = NodoBusqueda(sucesor, accion, nodo, costo_local)
+    return nodo
+
+
+@_con_estadisticas
+def busqueda_ancho_lote(problema, s0, estadisticas=None):
+    """
+    Búsqueda a lo ancho por capas, expandiendo cada capa con una sola
+    llamada a sucesores_lote (ver arriba lo que necesita el problema).
+
+    @param problema: Un ProblemaBusqueda con los métodos por lotes.
+    @param s0: El estado inicial (una tupla de enteros).
+    @param estadisticas: Un EstadisticasBusqueda opcional; solo se llenan
+                         los contadores y el tiempo total.
+
+    @return: Una tupla (plan, nodos_visitados) como en busqueda_ancho.
+
+    """
+    _requiere_numpy("busqueda_ancho_lote")
+    _requiere_lote(problema, "busqueda_ancho_lote")
+    if not problema.es_resoluble(s0):
+        return None, 0
+    if problema.terminal(s0):
+        return NodoBusqueda(s0), 1
+
+    capa = np.array([s0], dtype=np.min_scalar_type(max(s0)))
+    visitados = np.zeros(problema.tamano_rango, dtype=bool)
+    visitados[problema.rango_lote(capa)] = True
+    capas, padres_capas = [capa], [None]
+    nodos_visitados = 1
+
+    while len(capa):
+        hijos, padres = problema.sucesores_lote(capa)
+        rangos = problema.rango_lote(hijos)
+        nuevos = ~visitados[rangos]
+        rangos, indices = np.unique(rangos[nuevos], return_index=True)
+        hijos, padres = hijos[nuevos][indices], padres[nuevos][indices]
+        visitados[rangos] = True
+        nodos_visitados += len(hijos)
+        if estadisticas is not None:
+            estadisticas.expansiones += len(capa)
+            estadisticas.generados += len(nuevos)
+            estadisticas.agregados += len(hijos)
+            estadisticas.observa(len(hijos), nodos_visitados)
+        capas.append(hijos)
+        padres_capas.append(padres)
+
+        metas = np.nonzero(problema.terminal_lote(hijos))[0]
+        if len(metas):
+            i = metas[0]
+            camino = []
+            for nivel in range(len(capas) - 1, -1, -1):
+                camino.append(_a_tupla(capas[nivel][i]))
+                if padres_capas[nivel] is not None:
+                    i = padres_capas[nivel][i]
+            camino.reverse()
+            return _plan_de_estados(problema, camino), nodos_visitados
+        capa = hijos
+    return None, nodos_visitados
+
+
+@_con_estadisticas
+def busqueda_A_estrella_lote(problema, s0, heuristica, estadisticas=None):
+    """
+    A* por lotes: en cada paso se expanden juntos todos los estados con la
+    menor f, y la heurística se evalúa sobre todos los hijos a la vez.
+
+    La frontera es un diccionario de cubetas f -> lista de lotes, porque
+    con costos unitarios y heurísticas enteras hay pocas f distintas. El
+    mejor g de cada estado se guarda en un arreglo indexado por rango; un
+    renglón que sale de la frontera con un g peor que el guardado se
+    descarta.
+
+    @param problema: Un ProblemaBusqueda con los métodos por lotes.
+    @param s0: El estado inicial (una tupla de enteros).
+    @param heuristica: Una heurística admisible con atributo
+                       h_lote(estados) -> arreglo de enteros.
+    @param estadisticas: Un EstadisticasBusqueda opcional; solo se llenan
+                         los contadores y el tiempo total.
+
+    @return: Una tupla (plan, nodos_visitados) como en busqueda_A_estrella.
+
+    """
+    _requiere_numpy("busqueda_A_estrella_lote")
+    _requiere_lote(problema, "busqueda_A_estrella_lote")
+    if not problema.es_resoluble(s0):
+        return None, 0
+
+    inicial = np.array([s0], dtype=np.min_scalar_type(max(s0)))
+    mejor_g = np.full(problema.tamano_rango, np.iinfo(np.int32).max, dtype=np.int32)
+    rango = problema.rango_lote(inicial)
+    mejor_g[rango] = 0
+    # Todos los estados generados se guardan en bloques con el número
+    # global de su padre, para reconstruir el plan al final.
+    bloques, padres_bloques, inicios = [inicial], [np.array([-1])], [0]
+    total = 1
+    cero = np.zeros(1, dtype=np.int64)
+    f0 = int(heuristica.h_lote(inicial)[0])
+    cubetas = {f0: [(inicial, cero, rango, cero)]}
+    nodos_visitados = 0
+
+    while cubetas:
+        f = min(cubetas)
+        lotes = cubetas.pop(f)
+        estados = np.concatenate([lote[0] for lote in lotes])
+        g = np.concatenate([lote[1] for lote in lotes])
+        rangos = np.concatenate([lote[2] for lote in lotes])
+        ids = np.concatenate([lote[3] for lote in lotes])
+        vigentes = g == mejor_g[rangos]
+        rangos, indices = np.unique(rangos[vigentes], return_index=True)
+        estados, g, ids = estados[vigentes][indices], g[vigentes][indices], ids[vigentes][indices]
+        if not len(estados):
+            continue
+        nodos_visitados += len(estados)
+
+        metas = np.nonzero(problema.terminal_lote(estados))[0]
+        if len(metas):
+            i = int(ids[metas[0]])
+            camino = []
+            while i >= 0:
+                b = bisect.bisect_right(inicios, i) - 1
+                camino.append(_a_tupla(bloques[b][i - inicios[b]]))
+                i = int(padres_bloques[b][i - inicios[b]])
+            camino.reverse()
+            return _plan_de_estados(problema, camino), nodos_visitados
+
+        hijos, padres = problema.sucesores_lote(estados)
+        g_hijos = g[padres] + 1
+        r_hijos = problema.rango_lote(hijos)
+        mejores = g_hijos < mejor_g[r_hijos]
+        hijos, padres = hijos[mejores], padres[mejores]
+        g_hijos, r_hijos = g_hijos[mejores], r_hijos[mejores]
+        # Si un estado aparece varias veces se queda el de menor g.
+        orden = np.lexsort((g_hijos, r_hijos))
+        r_hijos, indices = np.unique(r_hijos[orden], return_index=True)
+        orden = orden[indices]
+        hijos, padres, g_hijos = hijos[orden], padres[orden], g_hijos[orden]
+        mejor_g[r_hijos] = g_hijos
+        if estadisticas is not None:
+            estadisticas.expansiones += len(estados)
+            estadisticas.generados += len(mejores)
+            estadisticas.agregados += len(hijos)
+        if not len(hijos):
+            continue
+
+        ids_hijos = np.arange(total, total + len(hijos))
+        bloques.append(hijos)
+        padres_bloques.append(ids[padres])
+        inicios.append(total)
+        total += len(hijos)
+
+        f_hijos = g_hijos + heuristica.h_lote(hijos)
+        for valor in np.unique(f_hijos):
+            cual = f_hijos == valor
+            cubetas.setdefault(int(valor), []).append(
+                (hijos[cual], g_hijos[cual], r_hijos[cual], ids_hijos[cual]))
+        if estadisticas is not None:
+            estadisticas.observa(sum(len(lote[0]) for lotes in cubetas.values()
+                                     for lote in lotes), total)
+    return None, nodos_visitados
+
+
+# ---------------------------------------------------------------------
+#
+# Búsqueda a lo ancho en memoria externa
+#
+# Cada capa (los estados a una misma profundidad) se guarda en disco como
+# un archivo de estados ordenados y sin repetir, escrito y leído por
+# bloques. Los sucesores de una capa se juntan en memoria hasta
+# max_estados, se ordenan y se vuelcan a archivos parciales, y al final
+# se mezclan entre sí y contra las capas anteriores (detección diferida
+# de duplicados), de forma que en memoria solo hay un bloque a la vez.
+# Los estados deben poder ordenarse (tuplas de números, por ejemplo).
+#
+# ---------------------------------------------------------------------
+
+_ESTADOS_POR_BLOQUE = 4096
+
+
+def _escribe_estados(ruta, estados, alto=None):
+    """
+    Escribe un iterable de estados en `ruta` por bloques. Si se da
+    alto(estado), se detiene justo después del primer estado para el que
+    regresa True.
+
+    @return: Una tupla (estados escritos, estado donde se detuvo o None).
+
+    """
+    n, detenido = 0, None
+    bloque = []
+    with open(ruta, 'wb') as archivo:
+        for estado in estados:
+            bloque.append(estado)
+            if alto is not None and alto(estado):
+                detenido = estado
+                break
+            if len(bloque) == _ESTADOS_POR_BLOQUE:
+                pickle.dump(bloque, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+                n += len(bloque)
+                bloque = []
+        if bloque:
+            pickle.dump(bloque, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+            n += len(bloque)
+    return n, detenido
+
+
+def _lee_estados(ruta):
+    with open(ruta, 'rb') as archivo:
+        while True:
+            try:
+                bloque = pickle.load(archivo)
+            except EOFError:
+                return
+            yield from bloque
+
+
+def _sin_repetidos(estados):
+    """
+    Quita los repetidos consecutivos de un iterable ordenado.
+
+    """
+    anterior = vacio = object()
+    for estado in estados:
+        if anterior is vacio or estado != anterior:
+            yield estado
+            anterior = estado
+
+
+def _resta_ordenados(estados, excluidos):
+    """
+    Los estados de `estados` que no están en `excluidos`, recorriendo los
+    dos iterables ordenados una sola vez.
+
+    """
+    vacio = object()
+    excluidos = iter(excluidos)
+    excluido = next(excluidos, vacio)
+    for estado in estados:
+        while excluido is not vacio and excluido < estado:
+            excluido = next(excluidos, vacio)
+        if excluido is vacio or excluido != estado:
+            yield estado
+
+
+@_con_estadisticas
+def busqueda_ancho_externa(problema, s0, directorio=None, max_estados=1000000,
+                           capas_previas=None, estadisticas=None):
+    """
+    Búsqueda a lo ancho con las capas en disco, para espacios de estados
+    que no caben en memoria.
+
+    Encuentra un plan con el mínimo número de acciones, como
+    busqueda_ancho, pero nunca tiene en memoria más de `max_estados`
+    estados. Los sucesores de una capa d solo se comparan contra las
+    `capas_previas` capas anteriores. Si desde cualquier sucesor se
+    regresa a su padre con a lo más k acciones, el sucesor no puede estar
+    antes de la capa d - k, así que bastan k + 1 capas: 2 si cada acción
+    se deshace con otra (las piezas deslizantes) y n en las rotaciones de
+    n x n, que solo giran en un sentido y se deshacen con n - 1 giros.
+    Con menos capas los estados repetidos vuelven a salir como nuevos y
+    la búsqueda puede no terminar. Por omisión se usa el atributo
+    `capas_previas` del problema si lo tiene y, si no (los dos botes), se
+    compara contra todas las capas.
+
+    @param problema: Un objeto de una clase heredada de ProblemaBusqueda
+    @param directorio: Dónde crear los archivos de las capas, o None para
+                       el directorio temporal del sistema. Se borran al
+                       terminar.
+    @param max_estados: Máximo de sucesores que se juntan en memoria antes
+                        de ordenarlos y volcarlos a disco.
+    @param capas_previas: Número de capas anteriores contra las que se
+                          quitan los repetidos, o None para tomarlo del
+                          problema (o usar todas si no lo define).
+    @param estadisticas: Un EstadisticasBusqueda opcional que se llena
+                         durante la búsqueda, incluyendo en `capas` el
+                         tamaño de cada capa.
+
+    @return: Una tupla (plan, nodos_visitados), donde nodos_visitados es
+             el número de estados distintos generados.
+
+    """
+    if not problema.es_resoluble(s0):
+        return None, 0
+    original = problema
+    if estadisticas is not None:
+        problema, _ = estadisticas.instrumenta(problema)
+        estadisticas.capas.append(1)
+    if problema.terminal(s0):
+        return NodoBusqueda(s0), 1
+    if directorio is not None:
+        os.makedirs(directorio, exist_ok=True)
+    if capas_previas is None:
+        capas_previas = getattr(original, 'capas_previas', None)
+
+    with tempfile.TemporaryDirectory(dir=directorio) as temporal:
+        capas = [os.path.join(temporal, "capa_0")]
+        _escribe_estados(capas[0], [s0])
+        nodos_visitados = 1
+        while True:
+            # Sucesores de la última capa, ordenados en corridas en disco.
+            corridas, sucesores = [], set()
+            for estado in _lee_estados(capas[-1]):
+                for accion in problema.acciones(estado):
+                    sucesores.add(problema.sucesor(estado, accion)[0])
+                if len(sucesores) >= max_estados:
+                    corridas.append(os.path.join(temporal, f"corrida_{len(corridas)}"))
+                    _escribe_estados(corridas[-1], sorted(sucesores))
+                    sucesores = set()
+            nuevos = _sin_repetidos(heapq.merge(
+                sorted(sucesores), *(_lee_estados(corrida) for corrida in corridas)))
+            del sucesores
+
+            previas = capas if capas_previas is None else capas[-capas_previas:]
+            nuevos = _resta_ordenados(
+                nuevos, heapq.merge(*(_lee_estados(capa) for capa in previas)))
+            capas.append(os.path.join(temporal, f"capa_{len(capas)}"))
+            n, meta = _escribe_estados(capas[-1], nuevos, problema.terminal)
+            for corrida in corridas:
+                os.remove(corrida)
+            nodos_visitados += n
+            if estadisticas is not None:
+                estadisticas.capas.append(n)
+                estadisticas.agregados += n
+                estadisticas.observa(n, 0)
+            if meta is not None:
+                return _plan_externo(original, capas, meta), nodos_visitados
+            if not n:
+                return None, nodos_visitados
+
+
+def _plan_externo(problema, capas, meta):
+    """
+    Plan hasta `meta`, que está en la última capa, buscando en cada capa
+    anterior un estado del que `meta` (y luego ese estado) es sucesor.
+
+    """
+    camino = [meta]
+    for capa in reversed(capas[:-1]):
+        for estado in _lee_estados(capa):
+            if any(problema.sucesor(estado, accion)[0] == camino[-1]
+                   for accion in problema.acciones(estado)):
+                camino.append(estado)
+                break
+    camino.reverse()
+    return _plan_de_estados(problema, camino)
+
+
+def _resuelve_trabajo(trabajo):
+    """
+    Resuelve un trabajo de resuelve_lote dentro de un proceso.
+
+    El plan se regresa como la lista de genera_plan, que se serializa sin
+    recursión (una cadena de nodos profunda no se puede serializar).
+
+    """
+    fabrica, s0, algoritmo, heuristica = trabajo
+    problema = fabrica()
+    if heuristica is None:
+        plan, nodos_visitados = algoritmo(problema, s0)
+    else:
+        plan, nodos_visitados = algoritmo(problema, s0, heuristica)
+    return (None if plan is None else plan.genera_plan()), nodos_visitados
+
+
+def resuelve_lote(trabajos, max_procesos=None, tam_bloque=None):
+    """
+    Resuelve varios problemas independientes en paralelo.
+
+    Cada trabajo es una tupla (fabrica, s0, algoritmo, heuristica), donde
+    fabrica() crea el problema, algoritmo es una de las búsquedas de este
+    módulo y heuristica es None para las búsquedas que no la usan. Todo
+    debe poder serializarse con pickle (funciones y clases definidas a
+    nivel de módulo, o functools.partial de ellas). Los trabajos se
+    reparten en bloques entre los procesos de un ProcessPoolExecutor.
+
+    @param trabajos: Una secuencia de trabajos.
+    @param max_procesos: Número de procesos (por omisión los núcleos);
+                         con 1 se resuelve todo en el proceso actual.
+    @param tam_bloque: Trabajos por envío a cada proceso (por omisión se
+                       hacen unos cuatro bloques por proceso).
+    @return: Una lista con un (plan, nodos_visitados) por trabajo, en el
+             mismo orden, donde plan es un NodoBusqueda o None.
+
+    """
+    trabajos = list(trabajos)
+    procesos = max_procesos or os.cpu_count() or 1
+    if procesos == 1:
+        resultados = map(_resuelve_trabajo, trabajos)
+    else:
+        if tam_bloque is None:
+            tam_bloque = max(1, len(trabajos) // (4 * procesos))
+        with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+            resultados = list(ejecutor.map(_resuelve_trabajo, trabajos,
+                                           chunksize=tam_bloque))
+    return [(None if plan is None else nodo_de_plan(plan), nodos)
+            for plan, nodos in resultados]
+
+
+def _dueno(estado, procesos):
+    """
+    Proceso dueño de un estado en busqueda_A_estrella_paralela.
+
+    Se usa crc32 de su repr en lugar de hash() porque el hash de las
+    cadenas cambia entre procesos.
+
+    """
+    return zlib.crc32(repr(estado).encode()) % procesos
+
+
+def _trabajador_hda(conexion, problema, heuristica, indice, procesos):
+    """
+    Proceso de busqueda_A_estrella_paralela dueño de una parte de los
+    estados, con su propia frontera y sus propios costos g.
+
+    Atiende tres mensajes: ('paso', entrantes, incumbente, lote) agrega los
+    nodos recibidos y expande hasta `lote` nodos con f menor al incumbente,
+    ('padre', estado) regresa el padre de un estado para reconstruir el
+    plan, y ('fin',) termina. Con cada paso regresa también sus contadores
+    de la ronda, para las estadísticas.
+
+    """
+    g, padres, abiertos = {}, {}, []
+    en_frontera = set()
+    contador = itertools.count()
+    agregados = 0
+
+    def inserta(estado, costo, padre, accion):
+        nonlocal agregados
+        if estado in g and g[estado] <= costo:
+            return
+        g[estado] = costo
+        padres[estado] = (padre, accion)
+        en_frontera.add(estado)
+        agregados += padre is not None
+        h = heuristica(NodoBusqueda(estado))
+        heapq.heappush(abiertos, (costo + h, h, next(contador), costo, estado))
+
+    while True:
+        mensaje = conexion.recv()
+        if mensaje[0] == 'padre':
+            estado = mensaje[1]
+            conexion.send((padres[estado], g[estado]))
+            continue
+        if mensaje[0] != 'paso':
+            break
+
+        _, entrantes, incumbente, lote = mensaje
+        agregados = 0
+        for nodo in entrantes:
+            inserta(*nodo)
+        salientes = [[] for _ in range(procesos)]
+        meta, expandidos, generados = None, 0, 0
+        while abiertos and expandidos < lote:
+            f, _, _, costo, estado = abiertos[0]
+            if costo > g[estado]:
+                heapq.heappop(abiertos)
+                continue
+            if f >= incumbente:
+                break
+            heapq.heappop(abiertos)
+            en_frontera.discard(estado)
+            if problema.terminal(estado):
+                meta, incumbente = (costo, estado), costo
+                continue
+            expandidos += 1
+            for a in problema.acciones(estado):
+                sucesor, costo_local = problema.sucesor(estado, a)
+                generados += 1
+                dueno = _dueno(sucesor, procesos)
+                if dueno == indice:
+                    inserta(sucesor, costo + costo_local, estado, a)
+                else:
+                    salientes[dueno].append((sucesor, costo + costo_local, estado, a))
+        while abiertos and abiertos[0][3] > g[abiertos[0][4]]:
+            heapq.heappop(abiertos)
+        minimo = abiertos[0][0] if abiertos else math.inf
+        conexion.send((salientes, minimo, meta,
+                       (expandidos, generados, agregados, len(en_frontera), len(g))))
+
+
+def _recibe_hda(conexion, trabajador, indice):
+    """
+    Respuesta del trabajador `indice` de busqueda_A_estrella_paralela, o
+    RuntimeError si el proceso murió antes de mandarla.
+
+    """
+    try:
+        return conexion.recv()
+    except EOFError:
+        trabajador.join()
+        raise RuntimeError(f"El proceso {indice} de busqueda_A_estrella_paralela "
+                           f"terminó sin responder (código de salida "
+                           f"{trabajador.exitcode})") from None
+
+
+@_con_estadisticas
+def busqueda_A_estrella_paralela(problema, s0, heuristica, procesos=None, lote=256,
+                                 estadisticas=None):
+    """
+    Búsqueda A* distribuida por hash (HDA*) entre varios procesos.
+
+    Cada estado tiene un proceso dueño (según el hash de su repr) que
+    guarda su frontera y sus costos g. Los procesos avanzan por rondas:
+    en cada una expanden hasta `lote` nodos y regresan los sucesores de
+    otros dueños, que este proceso reparte en la siguiente ronda. Como
+    todos los mensajes pasan por aquí, se sabe cuándo no hay ninguno en
+    camino; entonces, si ninguna frontera tiene un nodo con f menor al
+    costo de la mejor meta encontrada, esa meta es óptima.
+
+    El problema y la heurística se mandan a los procesos, así que deben
+    poder serializarse con pickle.
+
+    @param problema: Un objeto de una clase heredada de ProblemaBusqueda
+    @param heuristica: Una funcion de heuristica(nodo) admisible; solo
+                       puede usar nodo.estado.
+    @param procesos: Número de procesos (por omisión los núcleos).
+    @param lote: Número máximo de expansiones por proceso en cada ronda.
+    @param estadisticas: Un EstadisticasBusqueda opcional; solo se llenan
+                         los contadores (sumando los de todos los procesos)
+                         y el tiempo total. Los ganchos no se llaman.
+
+    @return: Una tupla (plan, nodos_visitados) igual que busqueda_A_estrella,
+             con los nodos expandidos por todos los procesos.
+
+    """
+    if not problema.es_resoluble(s0):
+        return None, 0
+    if problema.terminal(s0):
+        return NodoBusqueda(s0), 1
+
+    procesos = procesos or os.cpu_count() or 1
+    conexiones, trabajadores = [], []
+    for indice in range(procesos):
+        propia, del_trabajador = multiprocessing.Pipe()
+        trabajador = multiprocessing.Process(
+            target=_trabajador_hda,
+            args=(del_trabajador, problema, heuristica, indice, procesos),
+            daemon=True)
+        trabajador.start()
+        # Sin esta copia abierta, recv ve el fin del tubo si el trabajador
+        # muere en lugar de esperarlo para siempre.
+        del_trabajador.close()
+        conexiones.append(propia)
+        trabajadores.append(trabajador)
+
+    try:
+        pendientes = [[] for _ in range(procesos)]
+        pendientes[_dueno(s0, procesos)].append((s0, 0, None, None))
+        incumbente, meta, nodos_visitados = math.inf, None, 0
+        while True:
+            for conexion, entrantes in zip(conexiones, pendientes):
+                conexion.send(('paso', entrantes, incumbente, lote))
+            pendientes = [[] for _ in range(procesos)]
+            minimo = math.inf
+            tam_frontera = tam_cerrados = 0
+            for indice, conexion in enumerate(conexiones):
+                salientes, minimo_local, meta_local, contadores = _recibe_hda(
+                    conexion, trabajadores[indice], indice)
+                expandidos, generados, agregados, frontera_local, cerrados_local = contadores
+                nodos_visitados += expandidos
+                if estadisticas is not None:
+                    estadisticas.expansiones += expandidos
+                    estadisticas.generados += generados
+                    estadisticas.agregados += agregados
+                    tam_frontera += frontera_local
+                    tam_cerrados += cerrados_local
+                minimo = min(minimo, minimo_local)
+                for dueno, nodos in enumerate(salientes):
+                    pendientes[dueno].extend(nodos)
+                if meta_local is not None and meta_local[0] < incumbente:
+                    incumbente, meta = meta_local[0], meta_local
+            if estadisticas is not None:
+                estadisticas.observa(tam_frontera, tam_cerrados)
+            if not any(pendientes) and minimo >= incumbente:
+                break
+        if meta is None:
+            return None, nodos_visitados
+
+        # Se reconstruye el camino preguntando a cada dueño por el padre.
+        camino, estado = [], meta[1]
+        while estado is not None:
+            dueno = _dueno(estado, procesos)
+            conexiones[dueno].send(('padre', estado))
+            (padre, accion), costo = _recibe_hda(conexiones[dueno], trabajadores[dueno], dueno)
+            camino.append((estado, accion, costo))
+            estado = padre
+        camino.reverse()
+        plan = ([(x, a, c) for (x, _, _), (_, a, c) in zip(camino, camino[1:])] +
+                [(camino[-1][0], None, None)])
+        return nodo_de_plan(plan), nodos_visitados
+    finally:
+        # Un trabajador muerto ya no lee su tubo; mandarle 'fin' taparía el
+        # error original con un BrokenPipeError.
+        for conexion, trabajador in zip(conexiones, trabajadores):
+            if trabajador.is_alive():
+                try:
+                    conexion.send(('fin',))
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+        for conexion, trabajador in zip(conexiones, trabajadores):
+            trabajador.join()
+            conexion.close()
@@ -10,6 +10,9 @@ Una pequeña aplicación de las búsquedas
 __author__ = 'nombre del estudiante'
 
 
+import heapq
+import math
+
 import busquedas
 
 
@@ -59,6 +62,48 @@ class PbDosBotes(busquedas.ProblemaBusqueda):
     def terminal(self, estado):
         return self.meta in estado
 
+    def predecesores(self, estado):
+        # Se proponen los estados previos posibles para cada acción y se
+        # confirma cada uno con sucesor, porque vaciar y llenar no son
+        # reversibles (pierden cuánta agua había).
+        candidatos = []
+        for cubo in [0, 1]:
+            otro = 1 - cubo
+            if estado[cubo] == 0:
+                candidatos += [(('vaciar', cubo), v) for v in range(1, self.maximos[cubo] + 1)]
+            if estado[cubo] == self.maximos[cubo]:
+                candidatos += [(('llenar', cubo), v) for v in range(self.maximos[cubo])]
+            candidatos += [(('pasar', cubo), estado[cubo] + delta)
+                           for delta in range(1, estado[otro] + 1)]
+        previos = []
+        for accion, valor in candidatos:
+            verbo, cubo = accion
+            x = list(estado)
+            x[cubo] = valor
+            if verbo == 'pasar':
+                x[1 - cubo] -= valor - estado[cubo]
+            if x[cubo] > self.maximos[cubo]:
+                continue
+            x = tuple(x)
+            if accion in self.acciones(x) and self.sucesor(x, accion)[0] == estado:
+                previos.append((x, accion, self.calculo_costo_local(x, accion)))
+        return previos
+
+    def es_resoluble(self, s0):
+        # Si los cubos empiezan con múltiplos de g = mcd(x0_max, x1_max),
+        # todas las operaciones dejan múltiplos de g y nunca más que el
+        # cubo mayor. Con cantidades iniciales arbitrarias no se descarta.
+        g = math.gcd(*self.maximos)
+        if self.meta in s0 or any(x % g for x in s0):
+            return True
+        return self.meta == 0 or (self.meta <= max(self.maximos) and self.meta % g == 0)
+
+    def metas(self):
+        return ([(self.meta, y) for y in range(self.maximos[1] + 1)
+                 if self.meta <= self.maximos[0]] +
+                [(x, self.meta) for x in range(self.maximos[0] + 1)
+                 if self.meta <= self.maximos[1] and x != self.meta])
+
 
 class PbDosBotesCostoAgua(PbDosBotes):
     def calculo_costo_local(self, estado, accion):
@@ -69,24 +114,66 @@ class PbDosBotesCostoAgua(PbDosBotes):
         return costo
 
 
-def el_problema_mas_largo(max_cubo):
-    def costo_solucion(x):
-        plan, _ = busquedas.busqueda_ancho(PbDosBotes(x[0], x[1], x[2]), (0, 0))
-        return 0 if plan is None else plan.costo
+def costos_por_cantidad(problema, s0=(0, 0)):
+    """
+    Costo mínimo para tener cada cantidad de agua en alguno de los cubos.
 
-    return max(((i, j, x) for i in range(2, max_cubo + 1)
-                for j in range(1, i) for x in range(1, i)),
-               key=costo_solucion)
+    Hace un solo Dijkstra completo desde s0 sin revisar la meta del
+    problema; como los estados salen en orden de costo, la primera vez que
+    sale un estado con la cantidad x es el costo óptimo del problema con
+    meta x. Con costos unitarios es lo mismo que la profundidad de BFS.
 
+    @param problema: Un PbDosBotes (o subclase); su meta no se usa.
+    @param s0: El estado inicial.
+    @return: Un dict {cantidad: costo} con las cantidades alcanzables.
 
-def el_problema_mas_antiecologico(max_cubo):
-    def costo_solucion(x):
-        plan, _ = busquedas.busqueda_costo_uniforme(PbDosBotesCostoAgua(x[0], x[1], x[2]), (0, 0))
-        return 0 if plan is None else plan.costo
+    """
+    costos = {}
+    mejor = {s0: 0}
+    frontera = [(0, s0)]
+    while frontera:
+        costo, estado = heapq.heappop(frontera)
+        if costo > mejor[estado]:
+            continue
+        for x in estado:
+            if x not in costos:
+                costos[x] = costo
+        for a in problema.acciones(estado):
+            sucesor, costo_local = problema.sucesor(estado, a)
+            nuevo = costo + costo_local
+            if sucesor not in mejor or mejor[sucesor] > nuevo:
+                mejor[sucesor] = nuevo
+                heapq.heappush(frontera, (nuevo, sucesor))
+    return costos
+
+
+def barrido(max_cubo, clase=PbDosBotes):
+    """
+    Costo de todos los problemas (i, j, x) con 1 <= j < i <= max_cubo y
+    1 <= x < i, con una sola búsqueda por par de cubos.
+
+    @param max_cubo: Capacidad máxima del cubo mayor.
+    @param clase: PbDosBotes o PbDosBotesCostoAgua.
+    @return: Un dict {(i, j, x): costo}, con costo 0 si no hay solución.
 
-    return max(((i, j, x) for i in range(2, max_cubo + 1)
-                for j in range(1, i) for x in range(1, i)),
-               key=costo_solucion)
+    """
+    tabla = {}
+    for i in range(2, max_cubo + 1):
+        for j in range(1, i):
+            costos = costos_por_cantidad(clase(i, j))
+            for x in range(1, i):
+                tabla[(i, j, x)] = costos.get(x, 0)
+    return tabla
+
+
+def el_problema_mas_largo(max_cubo):
+    tabla = barrido(max_cubo, PbDosBotes)
+    return max(tabla, key=tabla.get)
+
+
+def el_problema_mas_antiecologico(max_cubo):
+    tabla = barrido(max_cubo, PbDosBotesCostoAgua)
+    return max(tabla, key=tabla.get)
 
 
 if __name__ == "__main__":
@@ -14,8 +14,165 @@ __author__ = 'juliowaissman'
 
 import busquedas
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-class Pb8Puzzle(busquedas.ProblemaBusqueda):
+
+_OPUESTA = {'N': 'S', 'S': 'N', 'E': 'O', 'O': 'E'}
+
+
+def _transformaciones_3x3():
+    """
+    Las 8 simetrías del cuadrado como permutaciones g de las casillas de un
+    tablero de 3 x 3 (g[p] es la casilla a la que va la casilla p).
+
+    """
+    transformaciones = []
+    for transpone in (False, True):
+        for voltea_fila in (False, True):
+            for voltea_col in (False, True):
+                g = []
+                for p in range(9):
+                    a, b = divmod(p, 3)
+                    if transpone:
+                        a, b = b, a
+                    if voltea_fila:
+                        a = 2 - a
+                    if voltea_col:
+                        b = 2 - b
+                    g.append(3 * a + b)
+                transformaciones.append(g)
+    return transformaciones
+
+
+class PbNPuzzle(busquedas.ProblemaBusqueda):
+    """
+    El problema del (n^2 - 1) puzzle en un tablero de n x n: el 8 puzzle
+    con n = 3, el 15 puzzle con n = 4 y el 24 puzzle con n = 5.
+
+    El estado es como en Pb8Puzzle: las n^2 casillas y al final el índice
+    del espacio vacío. Al crear el problema se calculan, para cada
+    posición del vacío, sus acciones legales y la casilla a la que lo
+    lleva cada una, así que sucesor solo intercambia dos casillas.
+
+    """
+    def __init__(self, n=4, meta=None):
+        """
+        @param n: El lado del tablero.
+        @param meta: Tupla de n^2 números con la configuración meta. Por
+                     omisión las piezas en orden y el vacío al final.
+
+        """
+        self.n = n
+        self.meta = tuple(meta) if meta is not None else tuple(range(1, n * n)) + (0,)
+        desplazamiento = {'N': -n, 'S': n, 'E': 1, 'O': -1}
+        self.acciones_legales = {}
+        self.destinos = []
+        for v in range(n * n):
+            fila, col = divmod(v, n)
+            posible = {'N': fila > 0, 'S': fila < n - 1, 'E': col < n - 1, 'O': col > 0}
+            legales = [a for a in 'NSEO' if posible[a]]
+            self.acciones_legales[v] = legales
+            self.destinos.append({a: v + desplazamiento[a] for a in legales})
+
+    # Cada movimiento se deshace con el opuesto, así que en
+    # busqueda_ancho_externa basta comparar contra dos capas.
+    capas_previas = 2
+
+    def acciones(self, estado):
+        return self.acciones_legales[estado[-1]]
+
+    def sucesor(self, estado, accion):
+        v = estado[-1]
+        d = self.destinos[v][accion]
+        s = list(estado)
+        s[v], s[d], s[-1] = s[d], 0, d
+        return tuple(s), 1
+
+    def terminal(self, estado):
+        return estado[:-1] == self.meta
+
+    def predecesores(self, estado):
+        # Todos los movimientos son reversibles: si desde estado se mueve
+        # el espacio con la acción a, desde ahí se regresa con la opuesta.
+        return [(previo, _OPUESTA[a], costo)
+                for a in self.acciones(estado)
+                for previo, costo in [self.sucesor(estado, a)]]
+
+    def metas(self):
+        return [self.meta + (self.meta.index(0),)]
+
+    def es_resoluble(self, s0):
+        # Cada movimiento es una transposición de las casillas (el vacío con
+        # una pieza) y mueve el vacío una casilla, así que la paridad de la
+        # permutación de todo el tablero cambia junto con la paridad de la
+        # distancia de manhattan del vacío a su lugar en la meta. En un
+        # tablero de ancho impar equivale a ver solo la paridad de las piezas.
+        n = self.n
+        v, w = s0[:-1].index(0), self.meta.index(0)
+        distancia = abs(v // n - w // n) + abs(v % n - w % n)
+        return busquedas.paridad(s0[:-1], self.meta) == distancia % 2
+
+    def sucesores_lote(self, estados):
+        """
+        Todos los sucesores de un ndarray de estados (un estado por
+        renglón), para las búsquedas por lotes. Necesita NumPy.
+
+        Para cada dirección se toman los renglones donde el vacío se puede
+        mover y se intercambian las dos casillas en todos a la vez, con la
+        tabla de destinos pasada a un arreglo (-1 si no es legal).
+
+        Para las búsquedas por lotes falta además rango_lote, que solo
+        tiene Pb8Puzzle: con n >= 4 un arreglo de visitados de (n^2)!
+        casillas no cabe en memoria.
+
+        @param estados: ndarray de forma (m, n^2 + 1).
+        @return: Una tupla (hijos, padres), donde padres[i] es el renglón
+                 de estados del que sale hijos[i].
+
+        """
+        casillas = self.n * self.n
+        if getattr(self, '_destinos_lote', None) is None:
+            self._destinos_lote = np.array(
+                [[self.destinos[v].get(a, -1) for a in 'NSEO'] for v in range(casillas)])
+        vacios = estados[:, casillas].astype(np.intp)
+        hijos, padres = [], []
+        for k in range(4):
+            destinos = self._destinos_lote[vacios, k]
+            filas = np.nonzero(destinos >= 0)[0]
+            d, v = destinos[filas], vacios[filas]
+            renglones = np.arange(len(filas))
+            nuevos = estados[filas]
+            nuevos[renglones, v] = nuevos[renglones, d]
+            nuevos[renglones, d] = 0
+            nuevos[:, casillas] = d
+            hijos.append(nuevos)
+            padres.append(filas)
+        return np.concatenate(hijos), np.concatenate(padres)
+
+    def terminal_lote(self, estados):
+        return np.all(estados[:, :-1] == np.asarray(self.meta), axis=1)
+
+    def dibuja(self, estado):
+        """
+        Dibuja un estado del tablero de n x n.
+
+        """
+        n = self.n
+        ancho = len(str(n * n - 1))
+        linea = "-" * ((ancho + 3) * n + 1) + "\n"
+        cadena = linea
+        for i in range(n):
+            for j in range(n):
+                t = estado[n * i + j]
+                cadena += "| " + (str(t) if t else "").rjust(ancho) + " "
+            cadena += "|\n" + linea
+        return cadena
+
+
+class Pb8Puzzle(PbNPuzzle):
     """
     El problema del 8 puzzle.
 
@@ -37,43 +194,62 @@ class Pb8Puzzle(busquedas.ProblemaBusqueda):
 
     Las acciones posibles son A = {N,S,E,O}
 
-    """
-    def __init__(self, meta = (1, 2, 3, 4, 5, 6, 7, 8, 0)):
-        self.meta = meta[:]
-        self.acciones_legales = {0: ['S', 'E'],
-                         1: ['S', 'E', 'O'],
-                         2: ['S', 'O'],
-                         3: ['N', 'S', 'E'],
-                         4: ['N', 'S', 'E', 'O'],
-                         5: ['N', 'S', 'O'],
-                         6: ['N', 'E'],
-                         7: ['N', 'E', 'O'],
-                         8: ['N', 'O']}
+    Con compacto=True las búsquedas guardan los visitados en un array
+    indexado por el código de Lehmer del tablero (2 bytes por cada uno de
+    los 9! tableros) en lugar de un dict, a cambio de calcular el rango
+    en cada consulta.
 
-    def acciones(self, estado):
-        return self.acciones_legales[estado[-1]]
+    Con simetrias=True los visitados se guardan por su representante
+    canónico: las reflexiones y rotaciones del tablero que dejan el vacío
+    de la meta en su lugar (renombrando las piezas para que la meta no
+    cambie) no cambian la distancia a la meta. Con el vacío en una esquina
+    solo queda la reflexión por la diagonal; con el vacío al centro, las 8.
 
-    def sucesor(self, estado, accion):
-        costo_local = 1
-        s = list(estado[:])
-        ind = s[-1]
-        bias = (-3 if accion == 'N' else
-                3 if accion == 'S' else
-                -1 if accion == 'O' else
-                1)
-        s[ind], s[ind + bias] = s[ind + bias], s[ind]
-        s[-1] += bias
-        return tuple(s), costo_local
-    
-    def terminal(self, estado):
-        return estado[:-1] == self.meta
+    """
+    def __init__(self, meta = (1, 2, 3, 4, 5, 6, 7, 8, 0), compacto=False,
+                 simetrias=False):
+        super().__init__(3, meta)
+        self.compacto = compacto
+        self.simetrias = simetrias
+        vacio = self.meta.index(0)
+        self.transformaciones = busquedas.simetrias_tablero(
+            [g for g in _transformaciones_3x3() if g[vacio] == vacio], self.meta)
+
+    def canonico(self, estado):
+        # El menor de los tableros simétricos, con el índice del vacío al
+        # final como en cualquier estado.
+        if not self.simetrias:
+            return estado
+        tablero = min(tuple(etiqueta[estado[o]] for o in origen)
+                      for origen, etiqueta in self.transformaciones)
+        return tablero + (tablero.index(0),)
+
+    def almacen(self):
+        # Las 9 casillas son una permutación de 0..8 (el índice del vacío
+        # se deduce de ellas), así que se indexan con su código de Lehmer.
+        if not self.compacto:
+            almacen = busquedas.AlmacenHash()
+        else:
+            almacen = busquedas.AlmacenRango(
+                lambda estado: busquedas.rango_parcial(estado[:9], 9), 362880)
+        if self.simetrias:
+            return busquedas.AlmacenCanonico(self.canonico, almacen)
+        return almacen
+
+    # Para las búsquedas por lotes, el mismo código de Lehmer.
+    tamano_rango = 362880
+
+    def rango_lote(self, estados):
+        return busquedas.rango_lote(estados[:, :9])
 
     @staticmethod
     def dibuja(estado):
         """
-        Dibuja un estado particular
+        Dibuja un estado particular (en tupla o empaquetado en un entero)
 
         """
+        if isinstance(estado, int):
+            estado = Pb8PuzzleEntero.decodifica(estado)
         cadena = "-------------\n"
         for i in range(3):
             for j in range(3):
@@ -85,6 +261,81 @@ class Pb8Puzzle(busquedas.ProblemaBusqueda):
         return cadena
 
 
+class Pb8PuzzleEntero(Pb8Puzzle):
+    """
+    El problema del 8 puzzle con el estado empaquetado en un entero.
+
+    La casilla i ocupa los bits 4i a 4i + 3 y el índice del espacio vacío
+    va a partir del bit 36. Por ejemplo el estado (1, 0, 2, ..., 8, 1) se
+    guarda como 0x1_876543201. Mover el vacío de la casilla v a la d es
+    llevar la pieza t de d a v con dos XOR (la casilla vacía vale 0) y
+    ajustar el índice del vacío; los corrimientos de cada movimiento se
+    calculan una vez al crear el problema. La meta se revisa con una
+    comparación de enteros.
+
+    Para convertir en la frontera con el resto del código se usan
+    codifica, decodifica y a_tuplas.
+
+    """
+    def __init__(self, meta = (1, 2, 3, 4, 5, 6, 7, 8, 0)):
+        super().__init__(meta)
+        self.meta_entero = self.codifica(self.meta + (self.meta.index(0),))
+        bias = {'N': -3, 'S': 3, 'O': -1, 'E': 1}
+        self.movimientos = [
+            {a: (4 * (v + bias[a]), 4 * v, bias[a] << 36)
+             for a in self.acciones_legales[v]}
+            for v in range(9)]
+
+    @staticmethod
+    def codifica(estado):
+        """
+        Empaqueta un estado en tupla (9 casillas y el índice del 0).
+
+        """
+        entero = estado[9] << 36
+        for i in range(9):
+            entero |= estado[i] << (4 * i)
+        return entero
+
+    @staticmethod
+    def decodifica(entero):
+        """
+        Regresa un estado empaquetado a la tupla de Pb8Puzzle.
+
+        """
+        return tuple((entero >> (4 * i)) & 15 for i in range(9)) + (entero >> 36,)
+
+    def a_tuplas(self, plan):
+        """
+        Copia un plan con estados empaquetados a uno con estados en tupla.
+
+        """
+        if plan is None:
+            return None
+        return busquedas.nodo_de_plan([(self.decodifica(x), a, c)
+                                       for (x, a, c) in plan.genera_plan()])
+
+    def acciones(self, estado):
+        return self.acciones_legales[estado >> 36]
+
+    def sucesor(self, estado, accion):
+        d, v, delta = self.movimientos[estado >> 36][accion]
+        t = (estado >> d) & 15
+        return (estado ^ (t << d) ^ (t << v)) + delta, 1
+
+    def terminal(self, estado):
+        return estado == self.meta_entero
+
+    def metas(self):
+        return [self.meta_entero]
+
+    def es_resoluble(self, s0):
+        return super().es_resoluble(self.decodifica(s0))
+
+    def almacen(self):
+        return busquedas.AlmacenHash()
+
+
 def h_1(nodo):
     """
     Primer heurística para el 8-puzzle:
@@ -105,7 +356,125 @@ def h_2(nodo):
                 for i in range(9) if nodo.estado[i] != 0])
 
 
-def probando(pos_ini):
+# Distancia de manhattan de la casilla i a la casilla t (0 para el vacío),
+# para evaluar h_2 sobre estados empaquetados y de forma incremental.
+_MANHATTAN = [[abs(i % 3 - t % 3) + abs(i // 3 - t // 3) if 0 < t < 9 else 0
+               for t in range(16)]
+              for i in range(9)]
+
+
+def _delta_h_2(estado_padre, accion, estado_hijo, h_padre):
+    """
+    h_2 del hijo a partir de la del padre: solo cambia la pieza que se
+    movió de la casilla donde queda el vacío a donde estaba.
+
+    """
+    v, d = estado_padre[-1], estado_hijo[-1]
+    t = estado_padre[d]
+    return h_padre + _MANHATTAN[v][t] - _MANHATTAN[d][t]
+
+
+h_2.delta = _delta_h_2
+
+
+def _h_1_lote(estados):
+    return np.count_nonzero(estados[:, 1:9] != np.arange(1, 9), axis=1)
+
+
+def _h_2_lote(estados):
+    return np.asarray(_MANHATTAN)[np.arange(9), estados[:, :9]].sum(axis=1)
+
+
+# Versiones por lotes (un estado por renglón de un ndarray), para
+# busquedas.busqueda_A_estrella_lote.
+h_1.h_lote = _h_1_lote
+h_2.h_lote = _h_2_lote
+
+
+def h_1_entero(nodo):
+    """
+    h_1 para estados empaquetados de Pb8PuzzleEntero.
+
+    """
+    e = nodo.estado
+    return sum([1 for i in range(1, 9) if i != (e >> (4 * i)) & 15])
+
+
+def h_2_entero(nodo):
+    """
+    h_2 para estados empaquetados de Pb8PuzzleEntero.
+
+    """
+    e = nodo.estado
+    return sum([_MANHATTAN[i][(e >> (4 * i)) & 15] for i in range(9)])
+
+
+def _delta_h_2_entero(estado_padre, accion, estado_hijo, h_padre):
+    """
+    Versión incremental de h_2_entero (ver _delta_h_2).
+
+    """
+    v, d = estado_padre >> 36, estado_hijo >> 36
+    t = (estado_padre >> (4 * d)) & 15
+    return h_padre + _MANHATTAN[v][t] - _MANHATTAN[d][t]
+
+
+h_2_entero.delta = _delta_h_2_entero
+
+
+class HeuristicaManhattan:
+    """
+    Distancia de manhattan a la meta para PbNPuzzle(n, meta).
+
+    A diferencia de h_2, que mide contra el tablero (0, 1, ..., 8), se
+    mide contra la meta del problema, con una tabla distancia[casilla][pieza]
+    calculada una sola vez. Tiene evaluación incremental (delta), igual
+    que h_2, y es un objeto de módulo para poder mandarla a otros procesos.
+
+    """
+    def __init__(self, n=4, meta=None):
+        """
+        @param n: El lado del tablero.
+        @param meta: La meta del problema (PbNPuzzle.meta).
+
+        """
+        if meta is None:
+            meta = tuple(range(1, n * n)) + (0,)
+        lugar = {t: i for i, t in enumerate(meta)}
+        self.n = n
+        self.distancia = [[abs(i // n - lugar[t] // n) + abs(i % n - lugar[t] % n) if t else 0
+                           for t in range(n * n)]
+                          for i in range(n * n)]
+        if np is not None:
+            self.tabla = np.array(self.distancia)
+            self.h_lote = self._h_lote
+
+    def __call__(self, nodo):
+        return sum([fila[t] for fila, t in zip(self.distancia, nodo.estado)])
+
+    def delta(self, estado_padre, accion, estado_hijo, h_padre):
+        v, d = estado_padre[-1], estado_hijo[-1]
+        t = estado_padre[d]
+        return h_padre + self.distancia[v][t] - self.distancia[d][t]
+
+    def _h_lote(self, estados):
+        casillas = self.n * self.n
+        return self.tabla[np.arange(casillas), estados[:, :casillas]].sum(axis=1)
+
+
+def h_manhattan(n=4, meta=None):
+    """
+    Distancia de manhattan a la meta para PbNPuzzle(n, meta).
+
+    @param n: El lado del tablero.
+    @param meta: La meta del problema (PbNPuzzle.meta).
+    @return: Un objeto HeuristicaManhattan, que se usa como heuristica(nodo).
+
+    """
+    return HeuristicaManhattan(n, meta)
+
+
+def probando(pos_ini, entero=False):
     """
     Muestra el resultado de aplicar un tipo de búsqeda
     al problema del 8 puzzle con una posición inicial
@@ -117,41 +486,51 @@ def probando(pos_ini):
     Recuerda que las búsquedas no informadas pueden ser
     muy lentas.
 
+    Con entero=True se busca sobre estados empaquetados
+    (Pb8PuzzleEntero) y los planes se convierten a tuplas
+    solo para mostrarlos.
+
     """
     print(Pb8Puzzle.dibuja(pos_ini))
-    problema = Pb8Puzzle()
     s0 = pos_ini[:] + (pos_ini.index(0),)  # Agrega la posición del espacio vacío al estado inicial
+    if entero:
+        problema = Pb8PuzzleEntero()
+        s0 = problema.codifica(s0)
+        h1, h2, muestra = h_1_entero, h_2_entero, problema.a_tuplas
+    else:
+        problema = Pb8Puzzle()
+        h1, h2, muestra = h_1, h_2, lambda plan: plan
 
     print("---------- Utilizando BFS -------------")
     plan, nodos_visitados = busquedas.busqueda_ancho(problema, s0)
-    print(plan)
+    print(muestra(plan))
     print(f"Explorando {nodos_visitados} nodos\n\n")
 
     print("---------- Utilizando DFS -------------")
     plan, nodos_visitados = busquedas.busqueda_profundo(problema, s0, 50)
-    print(plan)
+    print(muestra(plan))
     print(f"Explorando {nodos_visitados} nodos\n\n")
 
     # ------- IDS -----------
     print("---------- Utilizando IDS -------------")
     plan, nodos_visitados = busquedas.busqueda_profundidad_iterativa(problema, s0, 50)
-    print(plan)
+    print(muestra(plan))
     print(f"Explorando {nodos_visitados} nodos\n\n")
 
     # ------- UCS -----------
     print("---------- Utilizando UCS -------------")
     plan, nodos_visitados = busquedas.busqueda_costo_uniforme(problema, s0)
-    print(plan)
+    print(muestra(plan))
     print(f"Explorando {nodos_visitados} nodos\n\n")
 
     print("---------- Utilizando A* con h1 -------------")
-    plan, nodos_visitados = busquedas.busqueda_A_estrella(problema, s0, h_1)
-    print(plan)
+    plan, nodos_visitados = busquedas.busqueda_A_estrella(problema, s0, h1)
+    print(muestra(plan))
     print(f"Explorando {nodos_visitados} nodos\n\n")
 
     print("---------- Utilizando A* con h2 -------------")
-    plan, nodos_visitados = busquedas.busqueda_A_estrella(problema, s0, h_2)
-    print(plan)
+    plan, nodos_visitados = busquedas.busqueda_A_estrella(problema, s0, h2)
+    print(muestra(plan))
     print(f"Explorando {nodos_visitados} nodos\n\n")
 
 
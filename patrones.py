@@ -0,0 +1,311 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+patrones.py
+-----------
+
+Bases de datos de patrones (PDB) como heurísticas para el 8 puzzle y el
+cubo de Rubik 2D.
+
+Una base de patrones guarda la distancia exacta a la meta en un problema
+abstracto donde solo importan las posiciones de un subconjunto de piezas.
+Se construye una sola vez con una búsqueda a lo ancho hacia atrás desde
+la meta, y se guarda como una tabla de bytes indexada por el rango de las
+posiciones de las piezas del patrón (un hash perfecto), de forma que
+evaluar la heurística es solo una consulta a la tabla.
+
+"""
+
+from collections import deque
+import os
+
+from busquedas import rango_parcial
+
+
+def tamano_tabla(n, k):
+    """
+    Número de permutaciones parciales de k elementos tomados de n.
+
+    """
+    tamano = 1
+    for i in range(k):
+        tamano *= n - i
+    return tamano
+
+
+class BasePatrones:
+    """
+    Tabla de distancias exactas a la meta para un patrón de piezas.
+
+    El valor 255 marca una entrada no alcanzable (nunca pasa para
+    abstracciones de problemas con espacio de estados conexo).
+
+    """
+    NO_ALCANZABLE = 255
+
+    def __init__(self, patron, n, tabla):
+        """
+        @param patron: Tupla con las piezas que considera la abstracción.
+        @param n: Número de posiciones del tablero.
+        @param tabla: bytearray de tamaño n! / (n - len(patron))!.
+
+        """
+        self.patron = tuple(patron)
+        self.n = n
+        self.tabla = tabla
+
+    def distancia(self, posicion_de):
+        """
+        Distancia abstracta dada la posición de cada pieza.
+
+        @param posicion_de: Una secuencia donde posicion_de[pieza] es la
+                            casilla en la que está la pieza.
+        @return: La distancia guardada en la tabla.
+
+        """
+        return self.tabla[rango_parcial([posicion_de[p] for p in self.patron], self.n)]
+
+    def guarda(self, ruta):
+        """
+        Guarda la tabla en disco: una línea de encabezado y los bytes.
+
+        """
+        with open(ruta, 'wb') as archivo:
+            archivo.write(f"{self.n} {' '.join(map(str, self.patron))}\n".encode())
+            archivo.write(self.tabla)
+
+    @classmethod
+    def carga(cls, ruta):
+        """
+        Carga una tabla guardada con guarda.
+
+        """
+        with open(ruta, 'rb') as archivo:
+            encabezado = archivo.readline().decode().split()
+            tabla = bytearray(archivo.read())
+        n, patron = int(encabezado[0]), tuple(int(p) for p in encabezado[1:])
+        if len(tabla) != tamano_tabla(n, len(patron)):
+            raise ValueError(f"Tabla de patrones corrupta en {ruta}")
+        return cls(patron, n, tabla)
+
+
+class HeuristicaPatrones:
+    """
+    Heurística heuristica(nodo) a partir de varias bases de patrones.
+
+    Si las bases son aditivas (patrones disjuntos donde cada movimiento
+    solo cuesta en la base de la pieza que se mueve) se suman, si no se
+    toma el máximo. En ambos casos la heurística es admisible.
+
+    """
+    def __init__(self, bases, posiciones, aditiva=True):
+        """
+        @param bases: Lista de objetos BasePatrones.
+        @param posiciones: Función estado -> posicion_de (ver BasePatrones).
+        @param aditiva: True para sumar las bases, False para el máximo.
+
+        """
+        self.bases = bases
+        self.posiciones = posiciones
+        self.aditiva = aditiva
+
+    def __call__(self, nodo):
+        posicion_de = self.posiciones(nodo.estado)
+        valores = [base.distancia(posicion_de) for base in self.bases]
+        return sum(valores) if self.aditiva else max(valores)
+
+
+def _construye_o_carga(patron, n, construye, directorio, prefijo):
+    """
+    Carga la base del patrón de `directorio` si existe, si no la construye
+    (y la guarda ahí cuando se da un directorio).
+
+    """
+    ruta = None
+    if directorio is not None:
+        ruta = os.path.join(directorio, f"{prefijo}_{'_'.join(map(str, patron))}.pdb")
+        if os.path.exists(ruta):
+            return BasePatrones.carga(ruta)
+    base = BasePatrones(patron, n, construye(patron))
+    if ruta is not None:
+        os.makedirs(directorio, exist_ok=True)
+        base.guarda(ruta)
+    return base
+
+
+# ------------------------------------------------------------
+#  8 puzzle: bases aditivas
+# ------------------------------------------------------------
+
+def _vecinos_8puzzle():
+    return [[j for j in (i - 3, i + 3) if 0 <= j < 9] +
+            [j for j in (i - 1, i + 1) if 0 <= j < 9 and j // 3 == i // 3]
+            for i in range(9)]
+
+
+def construye_tabla_8puzzle(patron, meta):
+    """
+    Construye la tabla de un patrón aditivo del 8 puzzle.
+
+    El estado abstracto son las posiciones de las piezas del patrón más
+    la del espacio vacío. Mover el espacio sobre una pieza del patrón
+    cuesta 1 y sobre cualquier otra cuesta 0, así que se recorre con una
+    búsqueda a lo ancho 0-1 desde la meta (los movimientos son
+    reversibles). La tabla guarda el mínimo sobre la posición del vacío.
+
+    @param patron: Tupla de piezas (sin el 0).
+    @param meta: Tupla de 9 números con la configuración meta.
+    @return: bytearray indexado por rango_parcial de las posiciones.
+
+    """
+    vecinos = _vecinos_8puzzle()
+    k = len(patron)
+    tabla = bytearray([BasePatrones.NO_ALCANZABLE]) * tamano_tabla(9, k)
+    inicio = tuple(meta.index(p) for p in patron) + (meta.index(0),)
+    distancias = {inicio: 0}
+    cola = deque([inicio])
+    while cola:
+        abstracto = cola.popleft()
+        d = distancias[abstracto]
+        r = rango_parcial(abstracto[:k], 9)
+        if d < tabla[r]:
+            tabla[r] = d
+        vacio = abstracto[k]
+        for destino in vecinos[vacio]:
+            s = list(abstracto)
+            costo = 0
+            if destino in abstracto[:k]:
+                s[abstracto.index(destino)] = vacio
+                costo = 1
+            s[k] = destino
+            s = tuple(s)
+            if s not in distancias or distancias[s] > d + costo:
+                distancias[s] = d + costo
+                if costo:
+                    cola.append(s)
+                else:
+                    cola.appendleft(s)
+    return tabla
+
+
+def posiciones_8puzzle(estado):
+    """
+    posicion_de para un estado del 8 puzzle (9 casillas y el índice del 0).
+
+    """
+    posicion_de = [0] * 9
+    for i in range(9):
+        posicion_de[estado[i]] = i
+    return posicion_de
+
+
+def heuristica_8puzzle(meta=(1, 2, 3, 4, 5, 6, 7, 8, 0),
+                       particion=((1, 2, 3, 4), (5, 6, 7, 8)),
+                       directorio=None):
+    """
+    Heurística de patrones aditivos para Pb8Puzzle.
+
+    @param meta: La meta del problema (Pb8Puzzle.meta).
+    @param particion: Patrones disjuntos que cubren las piezas 1 a 8.
+    @param directorio: Donde guardar/cargar las tablas, o None.
+    @return: Un objeto HeuristicaPatrones, que se usa como heuristica(nodo).
+
+    """
+    meta = tuple(meta)
+    bases = [_construye_o_carga(patron, 9,
+                                lambda p: construye_tabla_8puzzle(p, meta),
+                                directorio,
+                                "8puzzle_" + "".join(map(str, meta)))
+             for patron in particion]
+    return HeuristicaPatrones(bases, posiciones_8puzzle, aditiva=True)
+
+
+# ------------------------------------------------------------
+#  Cubo de Rubik 2D: bases combinadas con el máximo
+# ------------------------------------------------------------
+
+def _movimientos_rubik():
+    """
+    Para cada rotación, una lista destino[p] con la casilla a la que va
+    el contenido de la casilla p.
+
+    """
+    movimientos = []
+    for fila in range(3):
+        destino = list(range(9))
+        i = 3 * fila
+        destino[i], destino[i + 1], destino[i + 2] = i + 1, i + 2, i
+        movimientos.append(destino)
+    for col in range(3):
+        destino = list(range(9))
+        destino[col], destino[col + 3], destino[col + 6] = col + 3, col + 6, col
+        movimientos.append(destino)
+    return movimientos
+
+
+def construye_tabla_rubik(patron, meta):
+    """
+    Construye la tabla de un patrón del cubo de Rubik 2D.
+
+    El estado abstracto son las posiciones de las piezas del patrón y
+    cada rotación cuesta 1. Como cada rotación mueve tres piezas, estas
+    tablas no son aditivas entre sí. La búsqueda hacia atrás desde la meta
+    usa las rotaciones inversas.
+
+    @param patron: Tupla de piezas (números del 1 al 9).
+    @param meta: Tupla de 9 números con la configuración meta.
+    @return: bytearray indexado por rango_parcial de las posiciones.
+
+    """
+    inversos = []
+    for destino in _movimientos_rubik():
+        origen = [0] * 9
+        for p, q in enumerate(destino):
+            origen[q] = p
+        inversos.append(origen)
+    tabla = bytearray([BasePatrones.NO_ALCANZABLE]) * tamano_tabla(9, len(patron))
+    inicio = tuple(meta.index(p) for p in patron)
+    tabla[rango_parcial(inicio, 9)] = 0
+    cola = deque([inicio])
+    while cola:
+        abstracto = cola.popleft()
+        d = tabla[rango_parcial(abstracto, 9)]
+        for origen in inversos:
+            s = tuple(origen[p] for p in abstracto)
+            r = rango_parcial(s, 9)
+            if tabla[r] == BasePatrones.NO_ALCANZABLE:
+                tabla[r] = d + 1
+                cola.append(s)
+    return tabla
+
+
+def posiciones_rubik(estado):
+    """
+    posicion_de para un estado del cubo de Rubik 2D (piezas del 1 al 9).
+
+    """
+    posicion_de = [0] * 10
+    for i in range(9):
+        posicion_de[estado[i]] = i
+    return posicion_de
+
+
+def heuristica_rubik(meta=(1, 2, 3, 4, 5, 6, 7, 8, 9),
+                     patrones=((1, 2, 3, 4, 5), (5, 6, 7, 8, 9)),
+                     directorio=None):
+    """
+    Heurística de patrones para PbCuboRubik (máximo de las bases).
+
+    @param meta: La meta del problema (PbCuboRubik.meta).
+    @param patrones: Patrones de piezas, pueden traslaparse.
+    @param directorio: Donde guardar/cargar las tablas, o None.
+    @return: Un objeto HeuristicaPatrones, que se usa como heuristica(nodo).
+
+    """
+    meta = tuple(meta)
+    bases = [_construye_o_carga(patron, 9,
+                                lambda p: construye_tabla_rubik(p, meta),
+                                directorio,
+                                "rubik_" + "".join(map(str, meta)))
+             for patron in patrones]
+    return HeuristicaPatrones(bases, posiciones_rubik, aditiva=False)
@@ -8,9 +8,18 @@ Tarea sobre búsquedas, donde lo que es importante es crear nuevas heurísticas
 
 """
 
+from array import array
+from collections import OrderedDict
+import functools
 import math
+import operator
 import busquedas
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 
 # ------------------------------------------------------------
@@ -92,6 +101,63 @@ class PbCamionMagico(busquedas.ProblemaBusqueda):
         """
         return estado == self.meta
 
+    def predecesores(self, estado):
+        """
+        Devuelve de dónde pude haber llegado a la posición x.
+
+        - Caminando desde x-1 (si x-1 >= 1), con costo 1.
+        - En camión desde x/2 (si x es par), con costo 2.
+
+        @param estado: int, la posición actual x.
+        @return: list de tuplas (estado_previo, accion, costo_local).
+
+        """
+        x = estado
+        previos = []
+        if x - 1 >= 1:
+            previos.append((x - 1, 'A', 1))
+        if x % 2 == 0 and x // 2 >= 1:
+            previos.append((x // 2, 'C', 2))
+        return previos
+
+    def metas(self):
+        """
+        La única meta es la posición N.
+
+        @return: list con el estado meta.
+
+        """
+        return [self.meta]
+
+    def es_resoluble(self, s0):
+        """
+        Como nunca puedo retroceder, solo llego a N si empiezo en 1 <= x <= N.
+
+        @param s0: int, la posición inicial.
+        @return: bool.
+
+        """
+        return 1 <= s0 <= self.meta
+
+    def distancias(self):
+        """
+        Tabla con el costo exacto para llegar a la meta desde cada x.
+
+        @return: array, ver distancias_camion.
+
+        """
+        return distancias_camion(self.meta)
+
+    def resuelve(self, s0):
+        """
+        Resuelve el problema sin búsqueda, ver plan_optimo_camion.
+
+        @param s0: int, la posición inicial.
+        @return: NodoBusqueda con un plan óptimo, o None si no hay solución.
+
+        """
+        return plan_optimo_camion(s0, self.meta)
+
     @staticmethod
     def bonito(estado):
         """
@@ -108,7 +174,33 @@ class PbCamionMagico(busquedas.ProblemaBusqueda):
 #  Desarrolla una política admisible.
 # ------------------------------------------------------------
 
-def h_1_camion_magico(nodo):
+class HeuristicaCamion:
+    """
+    Heurística heuristica(nodo) para PbCamionMagico(N) a partir de una
+    función cota(x, N) que no sobreestima el costo de x a N (ver
+    h_1_camion_magico y h_2_camion_magico).
+
+    """
+    def __init__(self, cota, N):
+        """
+        @param cota: Función de nivel de módulo cota(x, N) -> número.
+        @param N: int, la meta del problema (PbCamionMagico.meta).
+
+        """
+        self.cota = cota
+        self.N = N
+
+    def __call__(self, nodo):
+        return self.cota(nodo.estado, self.N)
+
+
+def _cota_1_camion(x, N):
+    if x >= N:
+        return 0
+    return math.ceil(math.log2(N / x))
+
+
+def h_1_camion_magico(N):
     """
     Primera heurística admisible para el problema del Camión Mágico.
 
@@ -121,15 +213,12 @@ def h_1_camion_magico(nodo):
     realidad el camión cuesta 2 y caminar solo suma 1, así que el costo
     real siempre va a ser mayor o igual a este valor. Nunca sobreestimo.
 
-    @param nodo: NodoBusqueda, el nodo actual (nodo.estado es la posición x).
-    @return: int, estimación del costo restante desde x hasta N.
+    @param N: int, la meta del problema (PbCamionMagico.meta).
+    @return: Un objeto HeuristicaCamion, que se usa como heuristica(nodo)
+             y estima el costo restante desde x = nodo.estado hasta N.
 
     """
-    x = nodo.estado
-    N = 100
-    if x >= N:
-        return 0
-    return math.ceil(math.log2(N / x))
+    return HeuristicaCamion(_cota_1_camion, N)
 
 
 # ------------------------------------------------------------
@@ -138,7 +227,20 @@ def h_1_camion_magico(nodo):
 #  respecto otra política
 # ------------------------------------------------------------
 
-def h_2_camion_magico(nodo):
+def _cota_2_camion(x, N):
+    if x >= N:
+        return 0
+    best = N - x
+    max_k = int(math.log2(N)) + 1
+    for k in range(1, max_k + 1):
+        walks = max(0, math.ceil(N / (2 ** k)) - x)
+        cost = 2 * k + walks
+        if cost < best:
+            best = cost
+    return best
+
+
+def h_2_camion_magico(N):
     """
     Segunda heurística admisible para el problema del Camión Mágico.
 
@@ -158,27 +260,174 @@ def h_2_camion_magico(nodo):
     camión cuesta 2 minutos (no 1), entonces da valores más altos y más
     cercanos al costo real. En las pruebas se nota: h_2 explora menos nodos.
 
-    @param nodo: NodoBusqueda, el nodo actual (nodo.estado es la posición x).
-    @return: int, estimación del costo restante desde x hasta N.
+    @param N: int, la meta del problema (PbCamionMagico.meta).
+    @return: Un objeto HeuristicaCamion, que se usa como heuristica(nodo)
+             y estima el costo restante desde x = nodo.estado hasta N.
 
     """
-    x = nodo.estado
-    N = 100
-    if x >= N:
-        return 0
-    best = N - x
-    max_k = int(math.log2(N)) + 1
-    for k in range(1, max_k + 1):
-        walks = max(0, math.ceil(N / (2 ** k)) - x)
-        cost = 2 * k + walks
-        if cost < best:
-            best = cost
-    return best
+    return HeuristicaCamion(_cota_2_camion, N)
+
+
+# ------------------------------------------------------------
+#  Costos exactos: como los estados son una recta, se pueden
+#  calcular todos de una vez (o resolver sin buscar)
+# ------------------------------------------------------------
+
+_TABLAS_CAMION = OrderedDict()
+_MAX_TABLAS_CAMION = 4
+
+
+def distancias_camion(N):
+    """
+    Costo exacto para llegar a N desde cada posición 1 <= x <= N.
+
+    Desde x solo puedo ir a x + 1 o a 2x, que son mayores, así que
+    recorro la recta de N hacia atrás y cada costo depende solo de
+    costos ya calculados: d[x] = min(1 + d[x + 1], 2 + d[2x]). Es O(N).
+
+    Las tablas se guardan en un caché por N que conserva solo las
+    últimas _MAX_TABLAS_CAMION usadas.
+
+    @param N: int, la meta.
+    @return: array de enteros sin signo de tamaño N + 1 (d[0] no se usa).
+
+    """
+    if N in _TABLAS_CAMION:
+        _TABLAS_CAMION.move_to_end(N)
+        return _TABLAS_CAMION[N]
+    d = array('I', [0]) * (N + 1)
+    for x in range(N - 1, 0, -1):
+        costo = d[x + 1] + 1
+        if 2 * x <= N and d[2 * x] + 2 < costo:
+            costo = d[2 * x] + 2
+        d[x] = costo
+    _TABLAS_CAMION[N] = d
+    if len(_TABLAS_CAMION) > _MAX_TABLAS_CAMION:
+        _TABLAS_CAMION.popitem(last=False)
+    return d
+
+
+class HeuristicaExactaCamion:
+    """
+    Heurística perfecta heuristica(nodo) para PbCamionMagico(N), leída de
+    la tabla de distancias_camion(N) (ver h_exacta_camion_magico).
+
+    """
+    def __init__(self, N):
+        """
+        @param N: int, la meta del problema (PbCamionMagico.meta).
+
+        """
+        self.N = N
+        self.distancias = distancias_camion(N)
+
+    def __call__(self, nodo):
+        return self.distancias[nodo.estado]
+
+
+def h_exacta_camion_magico(N):
+    """
+    Heurística perfecta para PbCamionMagico(N): el costo exacto a la meta.
+
+    Con ella A* solo expande nodos que están en algún camino óptimo.
+
+    @param N: int, la meta del problema.
+    @return: Un objeto HeuristicaExactaCamion, que se usa como heuristica(nodo).
+
+    """
+    return HeuristicaExactaCamion(N)
+
+
+def _mitades_camion(x, N):
+    """
+    La cadena N, N // 2, N // 4, ... mientras no baje de x, junto con el
+    costo óptimo de x a cada elemento.
+
+    Viendo el plan desde la meta hacia atrás: si y es impar el último paso
+    fue a pie, y si es par es mejor haber llegado en camión desde y / 2
+    que caminar desde más atrás (k pasos antes del camión valen por 2k
+    pasos después). Entonces a y solo se llega caminando desde x, o
+    caminando y % 2 pasos después de tomar el camión en y // 2:
+
+        c(y) = min(y - x, y % 2 + 2 + c(y // 2))   si y // 2 >= x
+
+    """
+    cadena = [N]
+    while cadena[-1] // 2 >= x:
+        cadena.append(cadena[-1] // 2)
+    costos = [0] * len(cadena)
+    costos[-1] = cadena[-1] - x
+    for i in range(len(cadena) - 2, -1, -1):
+        y = cadena[i]
+        costos[i] = min(y - x, y % 2 + 2 + costos[i + 1])
+    return cadena, costos
+
+
+def costo_optimo_camion(x, N):
+    """
+    Costo de un plan óptimo de x a N en O(log N), sin tablas ni búsqueda.
+
+    @param x: int, la posición inicial (1 <= x <= N).
+    @param N: int, la meta.
+    @return: int, el costo mínimo.
+
+    """
+    return _mitades_camion(x, N)[1][0]
+
+
+def plan_optimo_camion(x, N):
+    """
+    Plan óptimo de x a N en O(log N) (más el largo del plan).
+
+    @param x: int, la posición inicial.
+    @param N: int, la meta.
+    @return: NodoBusqueda final de un plan óptimo, como el que regresan
+             las búsquedas, o None si 1 <= x <= N no se cumple.
+
+    """
+    if not 1 <= x <= N:
+        return None
+    cadena, costos = _mitades_camion(x, N)
+    # Se decide de arriba hacia abajo qué tramos se hacen en camión
+    pasos = []
+    i = 0
+    while i + 1 < len(cadena) and costos[i] != cadena[i] - x:
+        pasos.append(['A'] * (cadena[i] % 2) + ['C'])
+        i += 1
+    pasos.append(['A'] * (cadena[i] - x))
+    nodo = busquedas.NodoBusqueda(x)
+    for tramo in reversed(pasos):
+        for accion in reversed(tramo):
+            y, costo = (nodo.estado + 1, 1) if accion == 'A' else (2 * nodo.estado, 2)
+            nodo = busquedas.NodoBusqueda(y, accion, nodo, costo)
+    return nodo
+
 
 # ------------------------------------------------------------
 #  Desarrolla el modelo del cubo de Rubik
 # ------------------------------------------------------------
 
+def _traslaciones_toro():
+    """
+    Las 9 traslaciones del tablero de 3 x 3 visto como toro, solas y
+    después de transponer, como permutaciones g de las casillas (g[p] es
+    la casilla a la que va la casilla p).
+
+    """
+    transformaciones = []
+    for transpone in (False, True):
+        for df in range(3):
+            for dc in range(3):
+                g = []
+                for p in range(9):
+                    f, c = divmod(p, 3)
+                    if transpone:
+                        f, c = c, f
+                    g.append(3 * ((f + df) % 3) + (c + dc) % 3)
+                transformaciones.append(g)
+    return transformaciones
+
+
 class PbCuboRubik(busquedas.ProblemaBusqueda):
     """
     Problema del Cubo de Rubik simplificado en 2D.
@@ -191,7 +440,7 @@ class PbCuboRubik(busquedas.ProblemaBusqueda):
     El estado se representa como una tupla de 9 enteros.
 
     """
-    def __init__(self, meta=None):
+    def __init__(self, meta=None, compacto=False, simetrias=False):
         """
         Inicializa el problema del cubo de Rubik 2D.
 
@@ -204,9 +453,17 @@ class PbCuboRubik(busquedas.ProblemaBusqueda):
         La meta por defecto es tenerlos ordenados: (1, 2, 3, 4, 5, 6, 7, 8, 9).
 
         @param meta: tuple o None, configuración objetivo (por defecto ordenada).
+        @param compacto: bool, si las búsquedas guardan los visitados en un
+                         array indexado por rango en lugar de un dict.
+        @param simetrias: bool, si las búsquedas guardan los visitados por
+                          su representante canónico (ver canonico).
 
         """
         self.meta = tuple(meta) if meta is not None else (1, 2, 3, 4, 5, 6, 7, 8, 9)
+        self.compacto = compacto
+        self.simetrias = simetrias
+        self.transformaciones = busquedas.simetrias_tablero(
+            _traslaciones_toro(), self.meta)
 
     def acciones(self, estado):
         """
@@ -261,6 +518,120 @@ class PbCuboRubik(busquedas.ProblemaBusqueda):
         """
         return tuple(estado) == self.meta
 
+    def predecesores(self, estado):
+        """
+        Devuelve los estados desde los que se llega a estado con una rotación.
+
+        Como cada rotación es un ciclo de 3, aplicarla dos veces es lo mismo
+        que deshacerla. Entonces el estado previo para la acción a es el
+        resultado de aplicar a dos veces sobre el estado actual.
+
+        @param estado: tuple, estado actual del tablero.
+        @return: list de tuplas (estado_previo, accion, costo_local).
+
+        """
+        previos = []
+        for a in self.acciones(estado):
+            s, _ = self.sucesor(estado, a)
+            s, _ = self.sucesor(s, a)
+            previos.append((s, a, 1))
+        return previos
+
+    def metas(self):
+        """
+        La única meta es la configuración ordenada.
+
+        @return: list con el estado meta.
+
+        """
+        return [self.meta]
+
+    def es_resoluble(self, s0):
+        """
+        Revisa la paridad del tablero respecto a la meta.
+
+        Cada rotación es un ciclo de 3 piezas, que es una permutación par.
+        Por eso solo llego a la meta si el tablero inicial es una permutación
+        par de ella (y las rotaciones alcanzan todas esas, 9!/2).
+
+        @param s0: tuple, el tablero inicial.
+        @return: bool.
+
+        """
+        return sorted(s0) == sorted(self.meta) and busquedas.paridad(s0, self.meta) == 0
+
+    def canonico(self, estado):
+        """
+        Representante de los tableros simétricos a estado.
+
+        Trasladar todo el tablero en el toro (las filas y columnas son
+        cíclicas) convierte cada rotación en otra rotación, y transponerlo
+        convierte rotar una fila a la derecha en rotar una columna hacia
+        abajo. Renombrando las piezas para que la meta quede fija, esas 18
+        transformaciones no cambian la distancia a la meta, así que basta
+        visitar el menor de los 18 tableros. Solo se usa con simetrias=True.
+
+        @param estado: tuple, estado actual (tupla de 9 enteros).
+        @return: tuple, el representante.
+
+        """
+        if not self.simetrias:
+            return estado
+        return min(tuple(etiqueta[estado[o]] for o in origen)
+                   for origen, etiqueta in self.transformaciones)
+
+    def almacen(self):
+        """
+        Almacén de visitados indexado por el código de Lehmer del tablero.
+
+        Cada tablero es una permutación de 1..9, así que hay 9! estados
+        posibles y basta un array de ese tamaño en lugar de un dict. Solo
+        se usa si el problema se creó con compacto=True.
+
+        @return: busquedas.AlmacenRango (o AlmacenHash) vacío, dentro de
+                 un AlmacenCanonico si se usan las simetrías.
+
+        """
+        if not self.compacto:
+            almacen = busquedas.AlmacenHash()
+        else:
+            almacen = busquedas.AlmacenRango(
+                lambda estado: busquedas.rango_parcial([v - 1 for v in estado], 9),
+                362880)
+        if self.simetrias:
+            return busquedas.AlmacenCanonico(self.canonico, almacen)
+        return almacen
+
+    # Una rotación se deshace con otras dos en el mismo sentido, así que en
+    # busqueda_ancho_externa hay que comparar contra tres capas.
+    capas_previas = 3
+
+    # Para las búsquedas por lotes (necesitan NumPy): cada rotación es una
+    # permutación de columnas del ndarray de estados, y el rango es el
+    # mismo código de Lehmer del almacén compacto.
+    tamano_rango = 362880
+
+    def sucesores_lote(self, estados):
+        """
+        Todos los sucesores de un ndarray de estados (un tablero por
+        renglón), aplicando cada rotación como una permutación de columnas.
+
+        @param estados: ndarray de forma (m, 9).
+        @return: Una tupla (hijos, padres), donde padres[i] es el renglón
+                 de estados del que sale hijos[i].
+
+        """
+        origenes = [list(self.sucesor(tuple(range(9)), a)[0]) for a in self.acciones(None)]
+        hijos = np.concatenate([estados[:, origen] for origen in origenes])
+        padres = np.tile(np.arange(len(estados)), len(origenes))
+        return hijos, padres
+
+    def terminal_lote(self, estados):
+        return np.all(estados == np.asarray(self.meta), axis=1)
+
+    def rango_lote(self, estados):
+        return busquedas.rango_lote(estados.astype(np.int64) - 1)
+
     @staticmethod
     def bonito(estado):
         """
@@ -343,6 +714,475 @@ def h_2_problema_1(nodo):
     return math.ceil(total / 3)
 
 
+# Distancia cíclica (filas más columnas) de la casilla pos a la casilla
+# meta de la pieza val, y casillas que mueve cada rotación.
+_DISTANCIA_CICLICA = [[0] + [((val - 1) // 3 - pos // 3) % 3 + ((val - 1) % 3 - pos % 3) % 3
+                             for val in range(1, 10)]
+                      for pos in range(9)]
+_CASILLAS_ROTACION = {'F0': (0, 1, 2), 'F1': (3, 4, 5), 'F2': (6, 7, 8),
+                      'C0': (0, 3, 6), 'C1': (1, 4, 7), 'C2': (2, 5, 8)}
+
+
+def _delta_h_2_problema_1(estado_padre, accion, estado_hijo, h_padre):
+    """
+    h_2_problema_1 del hijo a partir de la del padre.
+
+    Una rotación solo mueve 3 piezas, y a cada una le cambia su distancia
+    en -1 o en +2, así que la suma total cambia en un múltiplo de 3. Por
+    eso el redondeo hacia arriba no cambia y basta con sumar a h_padre el
+    cambio de las 3 piezas dividido entre 3.
+
+    """
+    cambio = 0
+    for pos in _CASILLAS_ROTACION[accion]:
+        cambio += (_DISTANCIA_CICLICA[pos][estado_hijo[pos]] -
+                   _DISTANCIA_CICLICA[pos][estado_padre[pos]])
+    return h_padre + cambio // 3
+
+
+h_2_problema_1.delta = _delta_h_2_problema_1
+
+
+def _h_1_problema_1_lote(estados):
+    mal = np.count_nonzero(estados != np.arange(1, 10), axis=1)
+    return (mal + 2) // 3
+
+
+def _h_2_problema_1_lote(estados):
+    total = np.asarray(_DISTANCIA_CICLICA)[np.arange(9), estados].sum(axis=1)
+    return (total + 2) // 3
+
+
+# Versiones por lotes (un tablero por renglón de un ndarray), para
+# busquedas.busqueda_A_estrella_lote.
+h_1_problema_1.h_lote = _h_1_problema_1_lote
+h_2_problema_1.h_lote = _h_2_problema_1_lote
+
+
+
+# ------------------------------------------------------------
+#  Rotaciones cíclicas en tableros de n x n
+# ------------------------------------------------------------
+
+class PbRotaciones(busquedas.ProblemaBusqueda):
+    """
+    El cubo de Rubik 2D generalizado a un tablero de n x n.
+
+    Las acciones son 'F0' a 'F{n-1}' (rotar una fila hacia la derecha) y
+    'C0' a 'C{n-1}' (rotar una columna hacia abajo), todas con costo 1.
+    Para cada acción se calcula al crear el problema de qué casilla viene
+    cada pieza, como un operator.itemgetter, así que un sucesor es una
+    sola llamada que arma la tupla nueva. Con n = 3 es PbCuboRubik.
+
+    """
+    def __init__(self, n=4, meta=None):
+        """
+        @param n: int, el lado del tablero.
+        @param meta: tuple o None, configuración objetivo (por defecto las
+                     piezas 1 a n^2 en orden).
+
+        """
+        self.n = n
+        self.meta = tuple(meta) if meta is not None else tuple(range(1, n * n + 1))
+        self.rotaciones = {}
+        self.inversas = {}
+        for i in range(n):
+            for accion, origen in ((f"F{i}", self._origen_fila(i)),
+                                   (f"C{i}", self._origen_columna(i))):
+                inversa = [0] * (n * n)
+                for p, o in enumerate(origen):
+                    inversa[o] = p
+                self.rotaciones[accion] = operator.itemgetter(*origen)
+                self.inversas[accion] = operator.itemgetter(*inversa)
+        self.lista_acciones = ([f"F{i}" for i in range(n)] +
+                               [f"C{i}" for i in range(n)])
+        # Deshacer una rotación toma n - 1 más (ver busqueda_ancho_externa).
+        self.capas_previas = n
+
+    def _origen_fila(self, fila):
+        # Al rotar a la derecha, a la casilla (fila, c) llega la pieza de
+        # (fila, c - 1).
+        n = self.n
+        origen = list(range(n * n))
+        for c in range(n):
+            origen[fila * n + c] = fila * n + (c - 1) % n
+        return origen
+
+    def _origen_columna(self, col):
+        # Al rotar hacia abajo, a la casilla (f, col) llega la pieza de
+        # (f - 1, col).
+        n = self.n
+        origen = list(range(n * n))
+        for f in range(n):
+            origen[f * n + col] = ((f - 1) % n) * n + col
+        return origen
+
+    def acciones(self, estado):
+        return self.lista_acciones
+
+    def sucesor(self, estado, accion):
+        return self.rotaciones[accion](estado), 1
+
+    def terminal(self, estado):
+        return estado == self.meta
+
+    def predecesores(self, estado):
+        return [(inversa(estado), accion, 1)
+                for accion, inversa in self.inversas.items()]
+
+    def metas(self):
+        return [self.meta]
+
+    def es_resoluble(self, s0):
+        # Una rotación es un ciclo de n piezas, que es una permutación par
+        # cuando n es impar: entonces solo se llega a tableros con la misma
+        # paridad que la meta. Con n par no se descarta nada.
+        if sorted(s0) != sorted(self.meta):
+            return False
+        return self.n % 2 == 0 or busquedas.paridad(s0, self.meta) == 0
+
+
+class HeuristicaRotaciones:
+    """
+    Heurística heuristica(nodo) admisible para PbRotaciones(n, meta), la
+    generalización de h_2_problema_1.
+
+    Suma, para cada pieza, cuántas rotaciones de fila (a la derecha) y de
+    columna (hacia abajo) la llevarían a su lugar en la meta, y divide
+    entre n redondeando hacia arriba: cada rotación mueve n piezas y a
+    cada una la acerca a lo más en 1. La distancia de cada pieza desde
+    cada casilla se calcula una sola vez. Tiene evaluación incremental
+    (delta), igual que h_2_problema_1.
+
+    """
+    def __init__(self, n=4, meta=None):
+        """
+        @param n: int, el lado del tablero.
+        @param meta: La meta del problema (PbRotaciones.meta).
+
+        """
+        if meta is None:
+            meta = tuple(range(1, n * n + 1))
+        lugar = {pieza: i for i, pieza in enumerate(meta)}
+        self.n = n
+        self.distancia = [{pieza: (j // n - i // n) % n + (j % n - i % n) % n
+                           for pieza, j in lugar.items()}
+                          for i in range(n * n)]
+        self.casillas = {}
+        for i in range(n):
+            self.casillas[f"F{i}"] = tuple(range(i * n, (i + 1) * n))
+            self.casillas[f"C{i}"] = tuple(range(i, n * n, n))
+
+    def __call__(self, nodo):
+        total = sum([fila[pieza] for fila, pieza in zip(self.distancia, nodo.estado)])
+        return -(-total // self.n)
+
+    def delta(self, estado_padre, accion, estado_hijo, h_padre):
+        """
+        La heurística del hijo a partir de la del padre.
+
+        La rotación mueve n piezas y a cada una le cambia su distancia en
+        -1 o en n - 1, así que la suma cambia en un múltiplo de n y el
+        redondeo hacia arriba no cambia (ver _delta_h_2_problema_1).
+
+        """
+        distancia = self.distancia
+        cambio = 0
+        for pos in self.casillas[accion]:
+            cambio += (distancia[pos][estado_hijo[pos]] -
+                       distancia[pos][estado_padre[pos]])
+        return h_padre + cambio // self.n
+
+
+def h_rotaciones(n=4, meta=None):
+    """
+    Heurística admisible para PbRotaciones(n, meta).
+
+    @param n: int, el lado del tablero.
+    @param meta: La meta del problema (PbRotaciones.meta).
+    @return: Un objeto HeuristicaRotaciones, que se usa como heuristica(nodo).
+
+    """
+    return HeuristicaRotaciones(n, meta)
+
+
+# ------------------------------------------------------------
+#  Lights Out
+# ------------------------------------------------------------
+
+@functools.lru_cache(maxsize=None)
+def _mascaras_lights_out(n):
+    """
+    Para cada casilla de un tablero n x n, la máscara de bits de la cruz
+    que cambia al presionarla (ella y sus vecinos arriba, abajo, a la
+    izquierda y a la derecha).
+
+    """
+    mascaras = []
+    for i in range(n * n):
+        fila, col = divmod(i, n)
+        m = 1 << i
+        if fila > 0:
+            m |= 1 << (i - n)
+        if fila < n - 1:
+            m |= 1 << (i + n)
+        if col > 0:
+            m |= 1 << (i - 1)
+        if col < n - 1:
+            m |= 1 << (i + 1)
+        mascaras.append(m)
+    return tuple(mascaras)
+
+
+class PbLightsOut(busquedas.ProblemaBusqueda):
+    """
+    Problema de Lights Out en un tablero de n x n.
+
+    Presionar una casilla cambia (prende o apaga) la luz de esa casilla y
+    de sus cuatro vecinas. La meta es dejar todas las luces apagadas.
+
+    El estado es un entero donde el bit fila * n + col vale 1 si esa luz
+    está prendida, así que presionar es hacer XOR con la máscara de la
+    cruz, que se calcula una sola vez. La acción es el índice de la
+    casilla que se presiona, y cada una cuesta 1.
+
+    """
+    def __init__(self, n=5):
+        """
+        @param n: int, el lado del tablero.
+
+        """
+        self.n = n
+        self.mascaras = _mascaras_lights_out(n)
+        self._eliminacion = None
+
+    @staticmethod
+    def codifica(tablero):
+        """
+        Convierte un tablero en lista de filas de 0 y 1 al entero del estado.
+
+        @param tablero: lista de n listas (o tuplas) de n enteros 0 o 1.
+        @return: int, el estado.
+
+        """
+        n = len(tablero)
+        return sum(1 << (n * fila + col)
+                   for fila in range(n) for col in range(n) if tablero[fila][col])
+
+    def acciones(self, estado):
+        """
+        Siempre se puede presionar cualquier casilla.
+
+        @return: range con los índices de las n * n casillas.
+
+        """
+        return range(self.n * self.n)
+
+    def sucesor(self, estado, accion):
+        """
+        Presiona la casilla `accion`.
+
+        @return: tuple (estado_sucesor, 1).
+
+        """
+        return estado ^ self.mascaras[accion], 1
+
+    def terminal(self, estado):
+        return estado == 0
+
+    def predecesores(self, estado):
+        # Presionar dos veces la misma casilla deja todo igual, así que
+        # los predecesores son los mismos que los sucesores.
+        mascaras = self.mascaras
+        return [(estado ^ mascaras[i], i, 1) for i in range(self.n * self.n)]
+
+    def metas(self):
+        return [0]
+
+    def _elimina(self):
+        """
+        Eliminación gaussiana sobre GF(2) del sistema A x = b, donde la
+        columna i de A es la cruz de la casilla i (A es simétrica, así que
+        la fila j también es la cruz de j). Se hace una sola vez y solo
+        depende de n.
+
+        Cada fila reducida se guarda junto con la combinación de
+        ecuaciones originales que la forman, para después obtener su lado
+        derecho con cualquier b como la paridad de (combinación & b).
+
+        """
+        if self._eliminacion is not None:
+            return self._eliminacion
+        total = self.n * self.n
+        filas = [[self.mascaras[j], 1 << j] for j in range(total)]
+        pivotes = []
+        r = 0
+        for col in range(total):
+            bit = 1 << col
+            for i in range(r, total):
+                if filas[i][0] & bit:
+                    break
+            else:
+                continue
+            filas[r], filas[i] = filas[i], filas[r]
+            for k in range(total):
+                if k != r and filas[k][0] & bit:
+                    filas[k][0] ^= filas[r][0]
+                    filas[k][1] ^= filas[r][1]
+            pivotes.append(col)
+            r += 1
+        # Cada columna libre da un vector del núcleo: ella en 1 y los
+        # pivotes de las filas que la contienen.
+        libres = [col for col in range(total) if col not in pivotes]
+        nucleo = []
+        for col in libres:
+            v = 1 << col
+            for i, pivote in enumerate(pivotes):
+                if filas[i][0] >> col & 1:
+                    v |= 1 << pivote
+            nucleo.append(v)
+        self._eliminacion = (pivotes,
+                             [c for _, c in filas[:r]],
+                             [c for _, c in filas[r:]],
+                             nucleo)
+        return self._eliminacion
+
+    def es_resoluble(self, s0):
+        """
+        Un tablero se puede apagar si b = s0 está en el espacio generado
+        por las cruces: las filas que quedaron en cero en la eliminación
+        deben tener lado derecho 0.
+
+        """
+        _, _, condiciones, _ = self._elimina()
+        return all(bin(c & s0).count("1") % 2 == 0 for c in condiciones)
+
+    def presiones_optimas(self, s0):
+        """
+        Conjunto mínimo de casillas a presionar para apagar s0, sin búsqueda.
+
+        Como el orden no importa y presionar dos veces es no presionar,
+        una solución es un vector x de GF(2) con A x = s0, y una óptima es
+        la de menos unos. Se toma la solución con las variables libres en
+        cero y se prueba sumándole cada combinación del núcleo (que tiene
+        dimensión pequeña: 2 para n = 5, por ejemplo).
+
+        @param s0: int, el estado inicial.
+        @return: int, máscara de bits de las casillas a presionar, o None
+                 si el tablero no tiene solución.
+
+        """
+        if not self.es_resoluble(s0):
+            return None
+        pivotes, combinaciones, _, nucleo = self._elimina()
+        x = 0
+        for pivote, c in zip(pivotes, combinaciones):
+            if bin(c & s0).count("1") % 2:
+                x |= 1 << pivote
+        mejor = x
+        # Recorre las 2^k combinaciones del núcleo en código Gray, así
+        # cada paso solo suma un vector.
+        for i in range(1, 1 << len(nucleo)):
+            x ^= nucleo[(i & -i).bit_length() - 1]
+            if bin(x).count("1") < bin(mejor).count("1"):
+                mejor = x
+        return mejor
+
+    def resuelve(self, s0):
+        """
+        Resuelve el problema sin búsqueda, ver presiones_optimas.
+
+        @param s0: int, el estado inicial.
+        @return: NodoBusqueda con un plan óptimo, o None si no hay solución.
+
+        """
+        presiones = self.presiones_optimas(s0)
+        if presiones is None:
+            return None
+        nodo = busquedas.NodoBusqueda(s0)
+        for i in range(self.n * self.n):
+            if presiones >> i & 1:
+                estado, costo_local = self.sucesor(nodo.estado, i)
+                nodo = busquedas.NodoBusqueda(estado, i, nodo, costo_local)
+        return nodo
+
+    def bonito(self, estado):
+        """
+        Representación bonita del tablero ('#' prendida, '.' apagada).
+
+        @param estado: int, el estado.
+        @return: str, el tablero en n líneas.
+
+        """
+        n = self.n
+        return "\n".join("".join('#' if estado >> (n * fila + col) & 1 else '.'
+                                 for col in range(n))
+                         for fila in range(n))
+
+
+def h_1_lights_out(nodo):
+    """
+    Primera heurística admisible para Lights Out.
+
+    Cada presión cambia a lo más 5 luces, así que con k luces prendidas
+    hacen falta al menos ceil(k / 5) presiones. Nunca sobreestima.
+
+    @param nodo: NodoBusqueda, el nodo actual.
+    @return: int, estimación del número de presiones que faltan.
+
+    """
+    return -(-bin(nodo.estado).count("1") // 5)
+
+
+class HeuristicaCruces:
+    """
+    Heurística heuristica(nodo) de cruces disjuntas para PbLightsOut(n)
+    (ver h_2_lights_out). Guarda las máscaras de las cruces del tablero
+    de n x n.
+
+    """
+    def __init__(self, n):
+        """
+        @param n: int, el lado del tablero.
+
+        """
+        self.n = n
+        self.mascaras = _mascaras_lights_out(n)
+
+    def __call__(self, nodo):
+        mascaras = self.mascaras
+        estado = nodo.estado
+        usadas = 0
+        cruces = 0
+        luces = estado
+        while luces:
+            i = (luces & -luces).bit_length() - 1
+            luces &= luces - 1
+            if not mascaras[i] & usadas:
+                usadas |= mascaras[i]
+                cruces += 1
+        return max(cruces, -(-bin(estado).count("1") // 5))
+
+
+def h_2_lights_out(n):
+    """
+    Segunda heurística admisible para Lights Out: cruces disjuntas.
+
+    Una luz prendida solo se apaga presionando alguna casilla de su cruz.
+    Si escojo luces prendidas cuyas cruces no se traslapan, cada una
+    necesita una presión distinta, así que su número es una cota inferior.
+    Las escojo de forma voraz en orden de casilla, y regreso el máximo con
+    h_1, así que domina a h_1.
+
+    Las cruces dependen del tamaño del tablero, así que la heurística se
+    crea para un n dado (el de PbLightsOut(n)).
+
+    @param n: int, el lado del tablero.
+    @return: Un objeto HeuristicaCruces, que se usa como heuristica(nodo).
+
+    """
+    return HeuristicaCruces(n)
+
 
 def compara_metodos(problema, pos_inicial, heuristica_1, heuristica_2):
     """
@@ -377,7 +1217,7 @@ if __name__ == "__main__":
     print("=" * 50)
     pos_inicial = 1
     problema = PbCamionMagico(100)
-    compara_metodos(problema, pos_inicial, h_1_camion_magico, h_2_camion_magico)
+    compara_metodos(problema, pos_inicial, h_1_camion_magico(100), h_2_camion_magico(100))
 
     print("=" * 50)
     print("  PROBLEMA DEL CUBO DE RUBIK 2D")
@@ -385,3 +1225,13 @@ if __name__ == "__main__":
     pos_inicial = (3, 1, 2, 6, 4, 5, 9, 7, 8)
     problema = PbCuboRubik()
     compara_metodos(problema, pos_inicial, h_1_problema_1, h_2_problema_1)
+
+    print("=" * 50)
+    print("  LIGHTS OUT 4x4")
+    print("=" * 50)
+    problema = PbLightsOut(4)
+    pos_inicial = PbLightsOut.codifica([[1, 1, 0, 1],
+                                        [1, 0, 1, 0],
+                                        [0, 1, 0, 1],
+                                        [1, 0, 1, 1]])
+    compara_metodos(problema, pos_inicial, h_1_lights_out, h_2_lights_out(4))
@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+tablas.py
+---------
+
+Tablas completas de distancias a la meta para problemas pequeños.
+
+Cuando todo el espacio de estados alcanzable cabe en memoria (el 8 puzzle
+y el cubo de Rubik 2D tienen 181,440 estados alcanzables cada uno, de 9!
+tableros, y los dos botes unos cuantos para cada par de capacidades), una
+sola búsqueda hacia atrás desde las metas da el costo exacto a la meta de
+todos los estados. La tabla se guarda en un archivo indexado por el rango
+del estado (un hash perfecto) y se consulta con mmap, sin copiarla a
+memoria. Resolver un estado es ir tomando la acción cuyo sucesor está a
+la distancia justa, así que cuesta lo mismo sin importar qué tan difícil
+sea la instancia.
+
+"""
+
+from array import array
+import heapq
+import math
+import mmap
+import os
+import zlib
+
+import busquedas
+
+# El encabezado ocupa siempre los mismos bytes para que los datos queden
+# alineados al tamaño de cualquier tipo de array. Tiene el tipo, el tamaño
+# y la firma del problema con que se construyó la tabla.
+_ENCABEZADO = 64
+
+
+def _firma(problema):
+    """
+    Identifica para qué problema es una tabla: la clase, un crc32 de sus
+    metas y de lo que cambia las distancias sin cambiar las metas (las
+    capacidades de los botes y si se reducen las simetrías).
+
+    """
+    datos = (problema.metas(), getattr(problema, 'maximos', None),
+             getattr(problema, 'simetrias', False))
+    return f"{type(problema).__name__}:{zlib.crc32(repr(datos).encode()):08x}"
+
+
+def _vacio(tipo):
+    """
+    Marcador de estado no alcanzable: el máximo entero del tipo, o
+    infinito si el tipo es flotante.
+
+    """
+    if tipo in 'fd':
+        return math.inf
+    return (1 << (8 * array(tipo).itemsize)) - 1
+
+
+class TablaDistancias:
+    """
+    Distancias exactas a la meta de todos los estados, leídas de un
+    archivo con mmap.
+
+    También se puede usar directamente como heurística (perfecta),
+    tabla(nodo).
+
+    """
+    def __init__(self, ruta, rango, problema=None, tipo=None):
+        """
+        Abre una tabla escrita por construye_tabla.
+
+        @param ruta: El archivo de la tabla.
+        @param rango: Función estado -> índice de la tabla, la misma con
+                      que se construyó.
+        @param problema: Si se da, se verifica que la tabla se haya
+                         construido para un problema igual.
+        @param tipo: Si se da, se verifica el tipo de las distancias.
+
+        """
+        self.rango = rango
+        with open(ruta, 'rb') as archivo:
+            self._mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            tipo_archivo, tamano, firma = self._mapa[:_ENCABEZADO].decode().split()
+        except ValueError:
+            self._mapa.close()
+            raise ValueError(f"Encabezado inválido en {ruta}") from None
+        if ((problema is not None and firma != _firma(problema))
+                or (tipo is not None and tipo_archivo != tipo)):
+            self._mapa.close()
+            raise ValueError(f"La tabla en {ruta} es para {firma} con tipo "
+                             f"'{tipo_archivo}', no para el problema dado")
+        self.tipo = tipo_archivo
+        self.firma = firma
+        self.vacio = _vacio(tipo_archivo)
+        self.distancias = memoryview(self._mapa)[_ENCABEZADO:].cast(tipo_archivo)
+        if len(self.distancias) != int(tamano):
+            self.cierra()
+            raise ValueError(f"Tabla de distancias corrupta en {ruta}")
+
+    def distancia(self, estado):
+        """
+        @return: El costo exacto de estado a la meta, o None si desde el
+                 estado no se llega a la meta.
+
+        """
+        d = self.distancias[self.rango(estado)]
+        return None if d == self.vacio else d
+
+    def __call__(self, nodo):
+        d = self.distancias[self.rango(nodo.estado)]
+        return math.inf if d == self.vacio else d
+
+    def plan(self, problema, s0):
+        """
+        Plan óptimo desde s0, siguiendo en cada paso una acción cuyo
+        sucesor está exactamente a la distancia del estado menos el costo
+        de la acción.
+
+        @param problema: El problema con que se construyó la tabla.
+        @param s0: El estado inicial.
+        @return: El NodoBusqueda final del plan, o None si no hay solución.
+
+        """
+        d = self.distancia(s0)
+        if d is None:
+            return None
+        nodo = busquedas.NodoBusqueda(s0)
+        while not problema.terminal(nodo.estado):
+            for accion in problema.acciones(nodo.estado):
+                estado, costo_local = problema.sucesor(nodo.estado, accion)
+                d_sucesor = self.distancia(estado)
+                if d_sucesor is not None and math.isclose(d_sucesor + costo_local, d):
+                    break
+            else:
+                raise ValueError("La tabla no corresponde al problema")
+            nodo = busquedas.NodoBusqueda(estado, accion, nodo, costo_local)
+            d = d_sucesor
+        return nodo
+
+    def cierra(self):
+        """
+        Libera el mmap. La tabla ya no se puede consultar después.
+
+        """
+        self.distancias.release()
+        self._mapa.close()
+
+    def __len__(self):
+        return len(self.distancias)
+
+
+def construye_tabla(problema, rango, tamano, ruta, tipo='B'):
+    """
+    Calcula la distancia a la meta de todos los estados que llegan a ella
+    y la guarda en `ruta`.
+
+    Es un Dijkstra hacia atrás desde problema.metas() con
+    problema.predecesores (con costos unitarios es una búsqueda a lo
+    ancho), y las distancias se guardan en un array del tipo dado indexado
+    por rango(estado).
+
+    @param problema: Un ProblemaBusqueda con metas y predecesores.
+    @param rango: Función estado -> entero en range(tamano).
+    @param tamano: Número de estados posibles.
+    @param ruta: Archivo donde se escribe la tabla.
+    @param tipo: Código de tipo de array para las distancias ('B' si
+                 caben en un byte, 'd' para costos flotantes).
+    @return: Un objeto TablaDistancias abierto sobre el archivo.
+
+    """
+    vacio = _vacio(tipo)
+    distancias = array(tipo, [vacio]) * tamano
+    frontera = []
+    for meta in problema.metas():
+        distancias[rango(meta)] = 0
+        frontera.append((0, rango(meta), meta))
+    heapq.heapify(frontera)
+    while frontera:
+        d, r, estado = heapq.heappop(frontera)
+        if d > distancias[r]:
+            continue
+        for previo, _, costo_local in problema.predecesores(estado):
+            r_previo = rango(previo)
+            if d + costo_local < distancias[r_previo]:
+                if d + costo_local >= vacio:
+                    raise OverflowError(f"Las distancias no caben en el tipo '{tipo}'")
+                distancias[r_previo] = d + costo_local
+                heapq.heappush(frontera, (d + costo_local, r_previo, previo))
+    with open(ruta, 'wb') as archivo:
+        archivo.write(f"{tipo} {tamano} {_firma(problema)}".encode().ljust(_ENCABEZADO))
+        distancias.tofile(archivo)
+    return TablaDistancias(ruta, rango, problema, tipo)
+
+
+def _construye_o_abre(problema, rango, tamano, ruta, tipo='B'):
+    # Si el problema tiene simetrías solo se calculan y consultan sus
+    # representantes, así que la tabla se debe abrir con un problema
+    # configurado igual que con el que se construyó (lo que verifica la
+    # firma del encabezado).
+    if busquedas._implementa(problema, 'canonico'):
+        rango = lambda estado, rango=rango: rango(problema.canonico(estado))
+    if os.path.exists(ruta):
+        return TablaDistancias(ruta, rango, problema, tipo)
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    return construye_tabla(problema, rango, tamano, ruta, tipo)
+
+
+# ------------------------------------------------------------
+#  Tablas para los problemas del repositorio
+# ------------------------------------------------------------
+
+def tabla_8puzzle(problema, ruta):
+    """
+    Tabla de un Pb8Puzzle (de estados en tuplas), indexada por el código
+    de Lehmer de las 9 casillas. La construye si `ruta` no existe, y si
+    existe pero es de otro problema lanza ValueError.
+
+    """
+    return _construye_o_abre(problema,
+                             lambda estado: busquedas.rango_parcial(estado[:9], 9),
+                             362880, ruta)
+
+
+def tabla_rubik(problema, ruta):
+    """
+    Tabla de un PbCuboRubik, indexada por el código de Lehmer del tablero.
+    La construye si `ruta` no existe (ver tabla_8puzzle).
+
+    """
+    return _construye_o_abre(problema,
+                             lambda estado: busquedas.rango_parcial([v - 1 for v in estado], 9),
+                             362880, ruta)
+
+
+def tabla_dos_botes(problema, ruta, tipo='H'):
+    """
+    Tabla de un PbDosBotes, indexada por el contenido de los dos cubos.
+    La construye si `ruta` no existe (ver tabla_8puzzle). Para
+    PbDosBotesCostoAgua, cuyos costos son flotantes, se usa tipo='d'.
+
+    """
+    x0_max, x1_max = problema.maximos
+    return _construye_o_abre(problema,
+                             lambda estado: estado[0] * (x1_max + 1) + estado[1],
+                             (x0_max + 1) * (x1_max + 1), ruta, tipo)